@@ -1,9 +1,9 @@
 #!/bin/bash
 
 count=0
-until [[ $(curl -f -s http://localhost:8000/health) ]] || [[ $count -ge 30 ]];
+until [[ $(curl -f -s http://localhost:8000/ready) ]] || [[ $count -ge 30 ]];
 do
 	sleep 1
 	((count++))
 done
-curl -f http://localhost:8000/health
+curl -f http://localhost:8000/ready
@@ -1,9 +1,21 @@
-from concurrent.futures.process import ProcessPoolExecutor
+import asyncio
+import time
+from typing import Callable
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Match
 
+from .core.ephemerides.dishas import dishas_cache
+from .core.ephemerides.tables import table_sets
+from .http_cache import conditional_get
+from .metrics import Collector, registry, request_latency, requests_in_flight
+from .result_cache import result_cache
 from .routes import calculations, calendars, ephemerides, models
+from .scheduler import Scheduler
+from .workers import WorkerPool
 
 app = FastAPI()
 
@@ -12,6 +24,9 @@ app.include_router(ephemerides.router)
 app.include_router(calculations.router)
 app.include_router(models.router)
 
+# Innermost middleware, so that 304 responses get the CORS headers
+app.middleware("http")(conditional_get)
+
 origins = ["*"]
 
 app.add_middleware(
@@ -23,9 +38,151 @@ app.add_middleware(
 )
 
 
+def route_path(request: Request) -> str:
+    """
+    Path template of the route of a request, bounding the number of labels.
+    """
+    for route in app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match != Match.NONE:
+            return getattr(route, "path", "unmatched")
+    return "unmatched"
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    route = route_path(request)
+    status = 500
+
+    requests_in_flight.inc(route=route)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        requests_in_flight.dec(route=route)
+        request_latency.observe(
+            time.perf_counter() - start,
+            route=route,
+            method=request.method,
+            status=str(status),
+        )
+
+
+def pool_metric(value: Callable[[WorkerPool], float | None]):
+    """
+    Samples of a metric of the worker pool, once started.
+    """
+
+    def collect():
+        if (executor := getattr(app.state, "executor", None)) is not None:
+            yield {}, value(executor)
+
+    return collect
+
+
+def worker_load_metrics():
+    if (executor := getattr(app.state, "executor", None)) is not None:
+        for pid, duration in executor.load_times.items():
+            yield {"pid": str(pid)}, duration
+
+
+def table_set_load_metrics():
+    for name, info in table_sets.info().items():
+        yield {"table_set": name}, info["load_time"]
+        for component, duration in info["components"].items():
+            yield {"table_set": name, "component": component}, duration
+
+
+registry.register(
+    Collector(
+        "kanon_pool_workers",
+        "Workers of the pool.",
+        "gauge",
+        pool_metric(lambda executor: executor.max_workers),
+    )
+)
+registry.register(
+    Collector(
+        "kanon_pool_warm_workers",
+        "Workers of the pool which have loaded the table sets.",
+        "gauge",
+        pool_metric(lambda executor: len(executor.load_times)),
+    )
+)
+registry.register(
+    Collector(
+        "kanon_pool_cold_start_seconds",
+        "Time taken by the pool to start every worker.",
+        "gauge",
+        pool_metric(lambda executor: executor.cold_start),
+    )
+)
+registry.register(
+    Collector(
+        "kanon_worker_load_seconds",
+        "Time taken by each worker to load the table sets.",
+        "gauge",
+        worker_load_metrics,
+    )
+)
+registry.register(
+    Collector(
+        "kanon_result_cache_events_total",
+        "Hits, misses and evictions of the result cache.",
+        "counter",
+        lambda: (({"event": k}, v) for k, v in result_cache.stats.items()),
+    )
+)
+registry.register(
+    Collector(
+        "kanon_result_cache_size",
+        "Entries and bytes of the result cache.",
+        "gauge",
+        lambda: (
+            ({"unit": "entries"}, len(result_cache.entries)),
+            ({"unit": "bytes"}, result_cache.size),
+        ),
+    )
+)
+registry.register(
+    Collector(
+        "kanon_dishas_cache_events_total",
+        "Hits, misses and invalid entries of the DISHAS cache.",
+        "counter",
+        lambda: (({"event": k}, v) for k, v in dishas_cache.stats.items()),
+    )
+)
+registry.register(
+    Collector(
+        "kanon_table_set_load_seconds",
+        "Time taken to load each table set, and each of its components.",
+        "gauge",
+        table_set_load_metrics,
+    )
+)
+registry.register(
+    Collector(
+        "kanon_table_set_bytes",
+        "Resident size of the loaded table sets.",
+        "gauge",
+        lambda: (
+            ({"table_set": name}, info["bytes"])
+            for name, info in table_sets.info().items()
+        ),
+    )
+)
+
+
 @app.on_event("startup")
 async def on_startup():
-    app.state.executor = ProcessPoolExecutor()
+    # The parent may load the shared tables, which must not block the loop
+    app.state.executor = await run_in_threadpool(WorkerPool)
+    app.state.scheduler = Scheduler(app.state.executor, app.state.executor.max_workers)
+    app.state.warm_up = asyncio.get_running_loop().run_in_executor(
+        None, app.state.executor.warm_up
+    )
 
 
 @app.on_event("shutdown")
@@ -36,3 +193,34 @@ async def on_shutdown():
 @app.get("/health")
 def health_check():
     return "OK"
+
+
+@app.get("/ready")
+def readiness_check(response: Response):
+    executor: WorkerPool = app.state.executor
+
+    if not executor.ready:
+        response.status_code = 503
+
+    return {
+        "ready": executor.ready,
+        "workers": executor.max_workers,
+        "warm_workers": len(executor.load_times),
+        "cold_start": executor.cold_start,
+        "table_load_times": list(executor.load_times.values()),
+    }
+
+
+@app.get("/cache")
+def cache_info():
+    return result_cache.info()
+
+
+@app.get("/table_sets")
+def table_sets_info():
+    return table_sets.info()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
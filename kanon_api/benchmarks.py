@@ -0,0 +1,246 @@
+"""
+Micro-benchmarks of the compute hot paths, run offline against the cached
+tables.
+
+Store the timings of the current tree as a JSON baseline with::
+
+    python -m kanon_api.benchmarks run -o baseline.json
+
+and check a later tree against it, failing on slowdowns beyond 10%, with::
+
+    python -m kanon_api.benchmarks compare baseline.json --threshold 0.1
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import timeit
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Iterable, NamedTuple
+
+from kanon.calendars import Date
+from kanon.models.models import equ_of_the_sun, planet_double_arg_mercury
+from kanon.units import Sexagesimal
+
+from kanon_api import settings
+from kanon_api.core.calculations.parser import parse
+from kanon_api.core.ephemerides.ascendant import ascendant
+from kanon_api.core.ephemerides.dishas import dishas_cache
+from kanon_api.core.ephemerides.houses import HouseMethods
+from kanon_api.core.ephemerides.table_classes import Mars, Mercury, TableSet
+from kanon_api.core.ephemerides.tables import table_sets
+from kanon_api.core.ephemerides.true_position import (
+    moon_true_pos,
+    planet_true_pos,
+    sun_true_pos,
+)
+from kanon_api.routes.models import TableContent, estimate_parameter, fill_by_model
+from kanon_api.streaming import OutputFormat
+from kanon_api.utils import JULIAN_CALENDAR
+
+BENCHMARKS_VERSION = 1
+
+TABLE_SET = "parisian_alphonsine_tables"
+
+# Noon of the 3rd of July 1327, and latitude of Paris
+DAYS = Date(JULIAN_CALENDAR, (1327, 7, 3)).days_from_epoch()
+LATITUDE = 48.85
+
+REPEAT = 5
+
+
+def benchmarks(table_set: TableSet) -> dict[str, Callable[[], Any]]:
+    """
+    Functions timed by the benchmarks, by name.
+    """
+    asc = ascendant(table_set, DAYS + 0.3, LATITUDE)
+
+    arg1 = [float(x) for x in range(30)]
+    entries = [equ_of_the_sun(x, 1) for x in arg1]
+    entries[5] = entries[11] = entries[13] = None
+
+    arg2 = [float(x) for x in range(5)]
+    double_entries = [planet_double_arg_mercury(x, y, 1, 2) for y in arg2 for x in arg1]
+
+    def content(model, params: dict[int, float | None], **args) -> TableContent:
+        return TableContent(arg1=arg1, params=params, model=model, **args)
+
+    found: dict[str, Callable[[], Any]] = {
+        "sun_true_pos": lambda: sun_true_pos(table_set, DAYS),
+        "moon_true_pos": lambda: moon_true_pos(table_set, DAYS),
+        "planet_true_pos[Mars]": lambda: planet_true_pos(DAYS, table_set(Mars)),
+        "planet_true_pos[Mercury]": lambda: planet_true_pos(DAYS, table_set(Mercury)),
+        "ascendant": lambda: ascendant(table_set, DAYS + 0.3, LATITUDE),
+        "parse": lambda: parse("1,2;3,4 + 5;6 * 2 - 0;10,30 / 3", Sexagesimal),
+        "fill_by_model": lambda: fill_by_model(
+            content(equ_of_the_sun, {50: 1}), OutputFormat.JSON
+        ),
+        "fill_by_model[2 args]": lambda: fill_by_model(
+            content(planet_double_arg_mercury, {124: 1, 125: 2}, arg2=arg2),
+            OutputFormat.JSON,
+        ),
+        # The entries are copied as their unknown values are removed in place
+        "estimate_parameter": lambda: dict(
+            estimate_parameter(list(entries), content(equ_of_the_sun, {50: None}))
+        ),
+        "estimate_parameter[2 args]": lambda: dict(
+            estimate_parameter(
+                list(double_entries),
+                content(planet_double_arg_mercury, {124: None, 125: None}, arg2=arg2),
+            )
+        ),
+    }
+
+    for method in HouseMethods:
+        found[f"houses[{method.name}]"] = partial(method, table_set, asc, LATITUDE)
+
+    return found
+
+
+def time(func: Callable[[], Any], repeat: int = REPEAT) -> dict[str, float]:
+    """
+    Best and median time of a call to `func`, in seconds, over `repeat` runs
+    of enough calls to last at least 0.2 seconds.
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    runs = [total / number for total in timer.repeat(repeat, number)]
+
+    return {
+        "number": number,
+        "best": min(runs),
+        "median": statistics.median(runs),
+    }
+
+
+def run(names: Iterable[str] | None = None, repeat: int = REPEAT) -> dict[str, Any]:
+    """
+    Timings of the benchmarks, all of them if `names` is None, with the
+    environment they were measured in.
+    """
+    dishas_cache.offline = True
+
+    table_set = table_sets[TABLE_SET]
+    found = benchmarks(table_set)
+
+    selected = list(found) if names is None else list(names)
+    if unknown := set(selected) - found.keys():
+        raise ValueError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    return {
+        "version": BENCHMARKS_VERSION,
+        "environment": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "table_engine": settings.TABLE_ENGINE,
+            "table_set": TABLE_SET,
+        },
+        "results": {name: time(found[name], repeat) for name in selected},
+    }
+
+
+class Comparison(NamedTuple):
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any]) -> list[Comparison]:
+    """
+    Best times of the benchmarks found in both runs.
+    """
+    for results in (baseline, current):
+        if (version := results["version"]) != BENCHMARKS_VERSION:
+            raise ValueError(f"Unsupported benchmarks version {version}")
+
+    return [
+        Comparison(name, timing["best"], current["results"][name]["best"])
+        for name, timing in baseline["results"].items()
+        if name in current["results"]
+    ]
+
+
+def regressions(comparisons: list[Comparison], threshold: float) -> list[Comparison]:
+    """
+    Benchmarks slower than their baseline by more than `threshold`.
+    """
+    return [c for c in comparisons if c.ratio > 1 + threshold]
+
+
+def load(path: Path) -> dict[str, Any]:
+    with path.open() as f:
+        return json.load(f)
+
+
+def main(args: Iterable[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Times the compute hot paths against the cached tables"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Runs the benchmarks")
+    run_parser.add_argument("-o", "--output", type=Path, help="JSON results file")
+    run_parser.add_argument("-k", "--benchmark", action="append", dest="names")
+    run_parser.add_argument("-r", "--repeat", type=int, default=REPEAT)
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="Compares the benchmarks to a baseline"
+    )
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument(
+        "current", type=Path, nargs="?", help="JSON results, run now if omitted"
+    )
+    compare_parser.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative slowdown flagged as a regression, defaults to 0.1",
+    )
+    compare_parser.add_argument("-r", "--repeat", type=int, default=REPEAT)
+
+    parsed = parser.parse_args(args)
+
+    if parsed.command == "run":
+        results = run(parsed.names, parsed.repeat)
+
+        for name, timing in results["results"].items():
+            print(f"{name:<32} {timing['best'] * 1e6:12.1f} µs")
+
+        if parsed.output:
+            with parsed.output.open("w") as f:
+                json.dump(results, f, indent=2)
+
+        return 0
+
+    baseline = load(parsed.baseline)
+    current = (
+        load(parsed.current)
+        if parsed.current
+        else run(list(baseline["results"]), parsed.repeat)
+    )
+
+    comparisons = compare(baseline, current)
+    slower = regressions(comparisons, parsed.threshold)
+
+    for c in comparisons:
+        flag = "REGRESSION" if c in slower else ""
+        print(
+            f"{c.name:<32} {c.baseline * 1e6:12.1f} µs {c.current * 1e6:12.1f} µs "
+            f"{c.ratio:6.2f}x {flag}"
+        )
+
+    return 1 if slower else 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,270 @@
+"""
+Precomputed daily true positions of the bodies of a table set.
+
+An almanac is a memory-mapped `.npy` array of the true positions, rounded to
+the second of arc, of every body at noon of every day of a JDN range, with a
+`.json` file describing it, with the versions of the code and of the table set
+it was computed with. Positions at noon are read from it as is, others
+are interpolated between the surrounding days when `settings.TABLE_ENGINE` is
+`"fast"`.
+
+Build an almanac with::
+
+    python -m kanon_api.core.ephemerides.almanac parisian_alphonsine_tables
+"""
+
+import argparse
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Iterable, Sequence, Type
+
+import numpy as np
+from kanon.units import Sexagesimal
+
+from kanon_api import settings
+from kanon_api.utils import JULIAN_CALENDAR, split_in_chunks
+from kanon_api.versions import tables_version
+
+from .table_classes import (
+    CelestialBody,
+    Jupiter,
+    Mars,
+    Mercury,
+    Moon,
+    Saturn,
+    Sun,
+    Venus,
+)
+from .tables import table_sets
+from .true_position import SharedTerms, true_pos_batch
+
+logger = logging.getLogger(__name__)
+
+ALMANAC_VERSION = 1
+
+BODIES: list[Type[CelestialBody]] = [Sun, Moon, Mars, Venus, Jupiter, Mercury, Saturn]
+
+SECONDS = 60 * 60
+
+FULL_CIRCLE = 360 * SECONDS
+
+CHUNK_SIZE = 1024
+
+# Maximum error of interpolated positions, in seconds of arc, as for the
+# compiled tables
+MAX_ERROR = 60
+
+# From 1 A.D. to 1700 A.D.
+DEFAULT_START = JULIAN_CALENDAR.era.epoch
+DEFAULT_STOP = JULIAN_CALENDAR.jdn_at_ymd(1700, 1, 1)
+
+
+def jdn_to_days(jdn: float) -> int:
+    """
+    Days from epoch at noon of the day of `jdn`.
+    """
+    return int(jdn - JULIAN_CALENDAR.era.epoch)
+
+
+def to_seconds(position: Sexagesimal) -> int:
+    """
+    Seconds of arc of a position rounded to 2 sexagesimal places.
+    """
+    degrees = 0
+    for digit in position.left:
+        degrees = degrees * 60 + digit
+    minutes, seconds = position.right
+    return (degrees * 60 + minutes) * 60 + seconds
+
+
+def from_seconds(seconds: int) -> str:
+    degrees, rest = divmod(seconds, SECONDS)
+    return str(Sexagesimal(divmod(degrees, 60), divmod(rest, 60)))
+
+
+def compute_chunk(table_set_name: str, days: Sequence[float]) -> np.ndarray:
+    """
+    Positions of every body in seconds of arc, one row for each of `days`.
+    """
+    table_set = table_sets[table_set_name]
+    terms = SharedTerms(table_set, days)
+
+    chunk = np.empty((len(days), len(BODIES)), dtype=np.int32)
+
+    for column, body in enumerate(BODIES):
+        for row, pos in enumerate(true_pos_batch(table_set(body), days, terms)):
+            rounded = round(pos, 2)
+            chunk[row, column] = to_seconds(rounded)
+
+            if from_seconds(int(chunk[row, column])) != str(rounded):
+                raise ValueError(f"Can't store {rounded} in an almanac")
+
+    return chunk
+
+
+class Almanac:
+    def __init__(self, path: Path):
+        with path.with_suffix(".json").open() as f:
+            meta = json.load(f)
+
+        if (version := meta["version"]) != ALMANAC_VERSION:
+            raise ValueError(f"Unsupported almanac version {version} in {path}")
+
+        self.table_set: str = meta["table_set"]
+        self.tables_version: str | None = meta.get("tables_version")
+        self.start: int = meta["start"]
+        self.columns = {body: idx for idx, body in enumerate(meta["bodies"])}
+        self.positions: np.ndarray = np.load(path, mmap_mode="r")
+
+    def get(self, body: str, days: float) -> str | None:
+        """
+        True position of `body` rounded to 2 sexagesimal places, if `days` is
+        in the almanac.
+        """
+        row, fraction = divmod(days - self.start, 1)
+        row = int(row)
+
+        if row < 0 or row >= len(self.positions) or body not in self.columns:
+            return None
+
+        column = self.columns[body]
+
+        if not fraction:
+            return from_seconds(int(self.positions[row, column]))
+
+        if (
+            settings.TABLE_ENGINE != "fast"
+            or row == 0
+            or row + 2 >= len(self.positions)
+        ):
+            return None
+
+        previous, motion, following = (
+            self._motion(idx, column) for idx in (row - 1, row, row + 1)
+        )
+
+        # Linear interpolation is off by at most an eighth of the change of
+        # daily motion, which is large where the tables are discontinuous
+        if max(abs(motion - previous), abs(following - motion)) > 8 * MAX_ERROR:
+            return None
+
+        position = int(self.positions[row, column]) + fraction * motion
+
+        return from_seconds(round(position) % FULL_CIRCLE)
+
+    def _motion(self, row: int, column: int) -> int:
+        """
+        Motion in seconds of arc from `row` to the following day.
+        """
+        motion = (
+            int(self.positions[row + 1, column]) - int(self.positions[row, column])
+        ) % FULL_CIRCLE
+        return motion - FULL_CIRCLE if motion > FULL_CIRCLE // 2 else motion
+
+
+_almanacs: dict[str, Almanac | None] = {}
+
+
+def almanac(table_set_name: str) -> Almanac | None:
+    """
+    Almanac of a table set found in `settings.ALMANAC_DIR`, loaded once.
+
+    Almanacs computed with another version of the code or of the table set are
+    ignored.
+    """
+    if table_set_name not in _almanacs:
+        path = settings.ALMANAC_DIR / f"{table_set_name}.npy"
+        table = Almanac(path) if path.exists() else None
+
+        if table is not None and table.tables_version != tables_version(table_set_name):
+            logger.warning("Ignoring the outdated almanac %s", path)
+            table = None
+
+        _almanacs[table_set_name] = table
+
+    return _almanacs[table_set_name]
+
+
+def build_almanac(
+    table_set_name: str,
+    start_jdn: float,
+    stop_jdn: float,
+    output: Path,
+    max_workers: int | None = None,
+):
+    start, stop = jdn_to_days(start_jdn), jdn_to_days(stop_jdn)
+    if stop <= start:
+        raise ValueError("The almanac must hold at least one day")
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    positions = np.lib.format.open_memmap(
+        output, mode="w+", dtype=np.int32, shape=(stop - start, len(BODIES))
+    )
+
+    compute = partial(compute_chunk, table_set_name)
+    chunks = list(split_in_chunks(range(start, stop), CHUNK_SIZE))
+
+    # Workers are only started when used
+    with ProcessPoolExecutor(max_workers) as executor:
+        results = (
+            map(compute, chunks) if max_workers == 1 else executor.map(compute, chunks)
+        )
+
+        row = 0
+        for chunk in results:
+            positions[row : row + len(chunk)] = chunk  # noqa: E203
+            row += len(chunk)
+
+    positions.flush()
+
+    with output.with_suffix(".json").open("w") as f:
+        json.dump(
+            {
+                "version": ALMANAC_VERSION,
+                "table_set": table_set_name,
+                "tables_version": tables_version(table_set_name),
+                "start": start,
+                "bodies": [body.__name__ for body in BODIES],
+            },
+            f,
+        )
+
+
+def main(args: Iterable[str] | None = None):
+    parser = argparse.ArgumentParser(
+        description="Builds the almanac of the true positions of a table set"
+    )
+    parser.add_argument("table_set", choices=list(table_sets))
+    parser.add_argument(
+        "--start", type=float, default=DEFAULT_START, help="First JDN (1 A.D.)"
+    )
+    parser.add_argument(
+        "--stop", type=float, default=DEFAULT_STOP, help="Excluded JDN (1700 A.D.)"
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        type=Path,
+        default=settings.ALMANAC_DIR,
+        help="Directory of the almanacs, defaults to settings.ALMANAC_DIR",
+    )
+    parser.add_argument("-j", "--jobs", type=int, default=None)
+    parsed = parser.parse_args(args)
+
+    settings.TABLE_ENGINE = "exact"
+
+    build_almanac(
+        parsed.table_set,
+        parsed.start,
+        parsed.stop,
+        parsed.output_dir / f"{parsed.table_set}.npy",
+        parsed.jobs,
+    )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
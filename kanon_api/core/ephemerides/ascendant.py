@@ -1,8 +1,11 @@
+from typing import Sequence
+
+import numpy as np
 from kanon.units.radices import BasedQuantity
 
 from kanon_api.core.ephemerides.table_classes import TableSet
 
-from .true_position import sun_true_pos
+from .true_position import SharedTerms, sun_true_pos, sun_true_pos_batch
 from .utils import mod
 
 
@@ -19,3 +22,38 @@ def ascendant(table_set: TableSet, days: float, latitude: float) -> BasedQuantit
     ascension_degree = mod(sun_rising + hours_arc + diurnal_arc / 2)
 
     return table_set.ObliqueAscension.reverse_get(ascension_degree, latitude)
+
+
+def ascendant_grid(
+    table_set: TableSet, days: Sequence[float], latitudes: Sequence[float]
+) -> np.ndarray:
+    """
+    Ascendants, without units, for every value of `days` (rows) and every
+    latitude (columns), equal to the values given by `ascendant`.
+
+    The sun position is computed once per day.
+    """
+    days_array = np.asarray(days, dtype=float)
+
+    whole_days, day_index = np.unique(np.round(days_array), return_inverse=True)
+
+    sun = sun_true_pos_batch(SharedTerms(table_set, whole_days))[day_index]
+    opposite_sun = (sun + 180) % 360
+
+    hours_arc = (days_array - np.round(days_array)) * 24 * 15
+
+    grid = np.empty((len(days_array), len(latitudes)), dtype=object)
+
+    for column, latitude in enumerate(latitudes):
+        sun_rising = table_set.ObliqueAscension.batch(sun, latitude)
+        sun_setting = table_set.ObliqueAscension.batch(opposite_sun, latitude)
+
+        diurnal_arc = (sun_setting - sun_rising) % 360
+
+        ascension_degree = (sun_rising + hours_arc + diurnal_arc / 2) % 360
+
+        grid[:, column] = table_set.ObliqueAscension.reverse_batch(
+            ascension_degree, latitude
+        )
+
+    return grid
@@ -0,0 +1,154 @@
+"""
+On disk cache of the DISHAS table contents.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable
+
+import requests
+from kanon.tables.htable import HTable
+from kanon.tables.htable_reader import DISHAS_REQUEST_URL, read_table_content
+from kanon.utils.types.dishas import TableContent
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from kanon_api import settings
+
+
+def checksum(content: object) -> str:
+    return hashlib.sha256(
+        json.dumps(content, sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+class DishasCache:
+    """
+    DISHAS table contents stored as `<id>.json` files in `directory`.
+
+    Entries are written atomically with the checksum of their content, and
+    fetched again if missing or corrupted, unless `offline`. Requests share a
+    pooled session.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        url: str = DISHAS_REQUEST_URL,
+        max_workers: int = 8,
+        timeout: float = 30,
+        offline: bool = False,
+    ):
+        self.directory = directory
+        self.url = url
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.offline = offline
+
+        self.stats: Counter[str] = Counter(hits=0, misses=0, invalid=0)
+        self._lock = threading.Lock()
+        self._session: requests.Session | None = None
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_maxsize=self.max_workers,
+                max_retries=Retry(
+                    total=3, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504]
+                ),
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._session = session
+        return self._session
+
+    def count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def path(self, tab_id: int) -> Path:
+        return self.directory / f"{tab_id}.json"
+
+    def load(self, tab_id: int) -> TableContent | None:
+        """
+        Cached content of table `tab_id`, if present and valid.
+        """
+        try:
+            with open(self.path(tab_id), "rb") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            entry = None
+
+        if not isinstance(entry, dict) or entry.get("checksum") != checksum(
+            entry.get("content")
+        ):
+            self.count("invalid")
+            return None
+
+        return entry["content"]
+
+    def store(self, tab_id: int, content: TableContent):
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        entry = json.dumps({"checksum": checksum(content), "content": content})
+
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(entry)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path(tab_id))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def fetch(self, tab_id: int) -> TableContent:
+        if self.offline:
+            raise FileNotFoundError(f"{tab_id} ID not found in the offline cache")
+
+        res = self.session.get(self.url.format(tab_id), timeout=self.timeout)
+        res.raise_for_status()
+
+        content: TableContent = res.json()
+        if not content or "error" in content:
+            raise FileNotFoundError(f"{tab_id} ID not found in DISHAS database")
+
+        self.store(tab_id, content)
+        return content
+
+    def get(self, tab_id: int) -> TableContent:
+        if (content := self.load(tab_id)) is not None:
+            self.count("hits")
+            return content
+
+        self.count("misses")
+        return self.fetch(tab_id)
+
+    def prefetch(self, tab_ids: Iterable[int]):
+        """
+        Concurrently fetches the tables missing from the cache.
+        """
+        missing = [tab_id for tab_id in set(tab_ids) if not self.path(tab_id).exists()]
+        if not missing:
+            return
+
+        with ThreadPoolExecutor(min(self.max_workers, len(missing))) as executor:
+            for _ in executor.map(self.fetch, missing):
+                self.count("misses")
+
+    def read(self, tab_id: int) -> HTable:
+        return read_table_content(self.get(tab_id))
+
+
+dishas_cache = DishasCache(settings.DISHAS_CACHE_DIR, offline=settings.DISHAS_OFFLINE)
@@ -0,0 +1,227 @@
+"""
+Search of the instants when true positions cross given longitudes.
+"""
+
+import math
+from itertools import combinations
+from typing import NamedTuple, Sequence, Type
+
+import numpy as np
+from kanon.units.radices import BasedReal
+
+from kanon_api.utils import StrEnum
+
+from .table_classes import CelestialBody, Moon, Sun, TableSet
+from .true_position import SharedTerms, true_pos_batch
+
+ZODIAC_SIGNS = [
+    "aries",
+    "taurus",
+    "gemini",
+    "cancer",
+    "leo",
+    "virgo",
+    "libra",
+    "scorpio",
+    "sagittarius",
+    "capricorn",
+    "aquarius",
+    "pisces",
+]
+
+# Events are bracketed to the hour, then linearly interpolated
+PRECISION = 1 / 24
+
+
+class EventType(StrEnum):
+    CONJUNCTION = "conjunction"
+    INGRESS = "ingress"
+    SYZYGY = "syzygy"
+
+
+class Crossing(NamedTuple):
+    """
+    Event happening when the longitude of `bodies[0]`, minus the one of
+    `bodies[1]` if any, crosses `target`, named `reverse_name` when crossing
+    it backwards.
+    """
+
+    type: EventType
+    name: str
+    reverse_name: str
+    bodies: tuple[Type[CelestialBody], ...]
+    target: float
+
+
+class Event(NamedTuple):
+    type: EventType
+    name: str
+    bodies: tuple[Type[CelestialBody], ...]
+    days: float
+    longitude: BasedReal
+
+
+def crossings(
+    event_types: Sequence[EventType], bodies: Sequence[Type[CelestialBody]]
+) -> list[Crossing]:
+    found: list[Crossing] = []
+
+    if EventType.CONJUNCTION in event_types:
+        found.extend(
+            Crossing(EventType.CONJUNCTION, "conjunction", "conjunction", pair, 0)
+            for pair in combinations(bodies, 2)
+        )
+
+    if EventType.INGRESS in event_types:
+        found.extend(
+            Crossing(EventType.INGRESS, sign, ZODIAC_SIGNS[idx - 1], (body,), 30 * idx)
+            for body in bodies
+            for idx, sign in enumerate(ZODIAC_SIGNS)
+        )
+
+    if EventType.SYZYGY in event_types:
+        found.append(Crossing(EventType.SYZYGY, "new_moon", "new_moon", (Moon, Sun), 0))
+        found.append(
+            Crossing(EventType.SYZYGY, "full_moon", "full_moon", (Moon, Sun), 180)
+        )
+
+    return found
+
+
+def signed_angle(angle: np.ndarray) -> np.ndarray:
+    """
+    Angles reduced to ]-180, 180].
+    """
+    return 180 - (180 - angle) % 360
+
+
+def offset(
+    crossing: Crossing, longitudes: dict[Type[CelestialBody], np.ndarray]
+) -> np.ndarray:
+    """
+    Signed angle between the longitudes of a crossing and its target.
+    """
+    angle = longitudes[crossing.bodies[0]] - crossing.target
+    if len(crossing.bodies) > 1:
+        angle = angle - longitudes[crossing.bodies[1]]
+    return signed_angle(angle)
+
+
+def crossing_positions(
+    table_set: TableSet, crossings: Sequence[Crossing], days: np.ndarray
+) -> dict[Type[CelestialBody], np.ndarray]:
+    """
+    Positions of the bodies of `crossings[i]` at `days[i]`, only computed for
+    the crossings involving each body.
+    """
+    positions: dict[Type[CelestialBody], np.ndarray] = {}
+
+    for body in dict.fromkeys(b for crossing in crossings for b in crossing.bodies):
+        involved = np.array([body in crossing.bodies for crossing in crossings])
+        positions[body] = np.empty(len(crossings), dtype=object)
+        positions[body][involved] = true_pos_batch(
+            table_set(body), list(days[involved])
+        )
+
+    return positions
+
+
+def offset_at(
+    table_set: TableSet, crossings: Sequence[Crossing], days: np.ndarray
+) -> np.ndarray:
+    """
+    Offset of `crossings[i]` at `days[i]`.
+    """
+    positions = crossing_positions(table_set, crossings, days)
+
+    first = [positions[c.bodies[0]][idx] for idx, c in enumerate(crossings)]
+    second = [
+        positions[c.bodies[1]][idx] if len(c.bodies) > 1 else 0
+        for idx, c in enumerate(crossings)
+    ]
+    targets = [c.target for c in crossings]
+
+    return signed_angle(
+        np.array(first, dtype=float) - np.array(second, dtype=float) - targets
+    )
+
+
+def find_events(
+    table_set: TableSet,
+    start: float,
+    stop: float,
+    step: float,
+    event_types: Sequence[EventType],
+    bodies: Sequence[Type[CelestialBody]],
+) -> list[Event]:
+    """
+    Events happening from `start` to `stop` days, in chronological order.
+
+    Positions are computed every `step` days, then events are located by
+    bisection between the steps where their offset changes sign, and linear
+    interpolation once bracketed to the hour.
+    """
+    searched = crossings(event_types, bodies)
+
+    count = math.ceil((stop - start) / step)
+    grid = [start + idx * step for idx in range(count)] + [stop]
+
+    terms = SharedTerms(table_set, grid)
+    longitudes = {
+        body: true_pos_batch(table_set(body), grid, terms).astype(float)
+        for body in dict.fromkeys(b for crossing in searched for b in crossing.bodies)
+    }
+
+    brackets: list[Crossing] = []
+    lows: list[float] = []
+    highs: list[float] = []
+    low_offsets: list[float] = []
+    high_offsets: list[float] = []
+
+    for crossing in searched:
+        angles = offset(crossing, longitudes)
+        negative = angles < 0
+
+        # Offsets jumping between 180 and -180 are not crossings
+        changes = (negative[:-1] != negative[1:]) & (np.abs(np.diff(angles)) < 180)
+
+        for idx in np.flatnonzero(changes):
+            brackets.append(crossing)
+            lows.append(grid[idx])
+            highs.append(grid[idx + 1])
+            low_offsets.append(angles[idx])
+            high_offsets.append(angles[idx + 1])
+
+    if not brackets:
+        return []
+
+    low = np.array(lows)
+    high = np.array(highs)
+    low_offset, high_offset = np.array(low_offsets), np.array(high_offsets)
+    forward = low_offset < 0
+
+    for _ in range(max(0, math.ceil(math.log2(step / PRECISION)))):
+        middle = (low + high) / 2
+        middle_offset = offset_at(table_set, brackets, middle)
+
+        same_side = (middle_offset < 0) == forward
+        low = np.where(same_side, middle, low)
+        low_offset = np.where(same_side, middle_offset, low_offset)
+        high = np.where(same_side, high, middle)
+        high_offset = np.where(same_side, high_offset, middle_offset)
+
+    instants = low + (high - low) * low_offset / (low_offset - high_offset)
+    positions = crossing_positions(table_set, brackets, instants)
+
+    events = [
+        Event(
+            crossing.type,
+            crossing.name if forward[idx] else crossing.reverse_name,
+            crossing.bodies,
+            float(instants[idx]),
+            positions[crossing.bodies[0]][idx],
+        )
+        for idx, crossing in enumerate(brackets)
+    ]
+
+    return sorted(events, key=lambda event: event.days)
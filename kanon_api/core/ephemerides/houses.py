@@ -1,7 +1,8 @@
 from enum import Enum
 from functools import partial
-from typing import cast
+from typing import Sequence, cast
 
+import numpy as np
 from kanon.units.radices import BasedQuantity, BasedReal
 
 from kanon_api.core.ephemerides.table_classes import TableSet
@@ -40,16 +41,9 @@ def meth_1(
     a8 = mod(a2 + 180)
     a9 = mod(a3 + 180)
 
-    return cast(
-        Houses,
-        (
-            ascendant,
-            *(
-                table_set.RightAscension.reverse_get(x).value
-                for x in (a2, a3, a4, a5, a6, a7, a8, a9, a10, a11, a12)
-            ),
-        ),
-    )
+    cusps = np.array((a2, a3, a4, a5, a6, a7, a8, a9, a10, a11, a12), dtype=object)
+
+    return cast(Houses, (ascendant, *table_set.RightAscension.reverse_batch(cusps)))
 
 
 def meth_2(
@@ -95,17 +89,12 @@ def meth_5(
     table_set: TableSet, ascendant: BasedReal, a0: BasedReal, a1: BasedReal
 ) -> Houses:
 
-    return cast(
-        Houses,
-        (
-            ascendant,
-            *(
-                table_set.RightAscension.reverse_get(mod(a1 + offset + 30)).value
-                for offset in range(0, 330, 30)
-            ),
-        ),
+    cusps = np.array(
+        [mod(a1 + offset + 30) for offset in range(0, 330, 30)], dtype=object
     )
 
+    return cast(Houses, (ascendant, *table_set.RightAscension.reverse_batch(cusps)))
+
 
 def meth_6(
     table_set: TableSet, ascendant: BasedReal, a0: BasedReal, a1: BasedReal
@@ -123,6 +112,43 @@ class HouseMethods(Enum):
 
         return self.value(table_set, ascendant.value, a0, a1)
 
+    @classmethod
+    def compare(
+        cls, table_set: TableSet, ascendant: BasedQuantity, latitude: float
+    ) -> dict[str, Houses]:
+        """
+        Houses given by every method, sharing the ascendant lookups.
+        """
+        a0 = table_set.ObliqueAscension.get(ascendant, latitude).value
+        a1 = table_set.RightAscension.reverse_get(ascendant.value).value
+
+        return {
+            method.name: method.value(table_set, ascendant.value, a0, a1)
+            for method in cls
+        }
+
+    def grid(
+        self, table_set: TableSet, ascendants: np.ndarray, latitudes: Sequence[float]
+    ) -> np.ndarray:
+        """
+        Houses for a grid of ascendants without units, with one column per
+        latitude, equal to the houses given by calling the method.
+        """
+        grid = np.empty(ascendants.shape, dtype=object)
+
+        for column, latitude in enumerate(latitudes):
+            ascendant = ascendants[:, column]
+
+            a0 = table_set.ObliqueAscension.batch(ascendant, latitude)
+            a1 = table_set.RightAscension.reverse_batch(ascendant)
+
+            for row in range(len(ascendant)):
+                grid[row, column] = self.value(
+                    table_set, ascendant[row], a0[row], a1[row]
+                )
+
+        return grid
+
     M1 = partial(meth_1)
     M2 = partial(meth_2)
     M5 = partial(meth_5)
@@ -0,0 +1,90 @@
+from multiprocessing import shared_memory
+from typing import NamedTuple
+
+import numpy as np
+
+
+class SharedTable(NamedTuple):
+    args: np.ndarray
+    values: np.ndarray
+    significant: int
+    unit: str
+    key_unit: str
+
+
+class TableLayout(NamedTuple):
+    offset: int
+    length: int
+    significant: int
+    unit: str
+    key_unit: str
+
+
+StoreHandle = tuple[str, dict[str, TableLayout]]
+
+
+class SharedTableStore:
+    """
+    Float64 arguments and values of tables, laid out in a single shared memory
+    block that other processes can attach to without copying it.
+    """
+
+    def __init__(
+        self, memory: shared_memory.SharedMemory, layout: dict[str, TableLayout]
+    ):
+        self.memory = memory
+        self.layout = layout
+        self.tables = {key: self._view(info) for key, info in layout.items()}
+
+    def _view(self, info: TableLayout) -> SharedTable:
+        data: np.ndarray = np.ndarray(
+            (2, info.length),
+            dtype=np.float64,
+            buffer=self.memory.buf,
+            offset=info.offset,
+        )
+        return SharedTable(data[0], data[1], *info[2:])
+
+    @classmethod
+    def create(cls, tables: dict[str, SharedTable]) -> "SharedTableStore":
+        layout: dict[str, TableLayout] = {}
+        offset = 0
+
+        for key, table in tables.items():
+            layout[key] = TableLayout(offset, len(table.args), *table[2:])
+            offset += 2 * len(table.args) * np.dtype(np.float64).itemsize
+
+        store = cls(shared_memory.SharedMemory(create=True, size=offset or 1), layout)
+
+        for key, table in tables.items():
+            store.tables[key].args[:] = table.args
+            store.tables[key].values[:] = table.values
+
+        return store
+
+    @classmethod
+    def attach(cls, handle: StoreHandle) -> "SharedTableStore":
+        name, layout = handle
+        return cls(shared_memory.SharedMemory(name=name), layout)
+
+    @property
+    def handle(self) -> StoreHandle:
+        return self.memory.name, self.layout
+
+    def unlink(self):
+        self.memory.unlink()
+
+
+shared_tables: dict[str, SharedTable] = {}
+
+_stores: list[SharedTableStore] = []
+
+
+def attach_store(handle: StoreHandle):
+    """
+    Makes the tables of a `SharedTableStore` available to the `TableFunction`
+    created from now on in this process.
+    """
+    store = SharedTableStore.attach(handle)
+    _stores.append(store)
+    shared_tables.update(store.tables)
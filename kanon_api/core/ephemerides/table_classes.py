@@ -1,17 +1,38 @@
 import json
+from bisect import bisect
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, lru_cache
 from pathlib import Path
 from typing import Type, TypeVar, cast
 
+import numpy as np
 from kanon.tables.htable import HTable
 from kanon.tables.symmetries import Symmetry
 from kanon.units import Sexagesimal
 from kanon.units.radices import BasedQuantity, BasedReal
 from kanon.utils.types.number_types import Real
 
+from kanon_api import settings
 from kanon_api.units import degree
-from kanon_api.utils import DeferedMeta
-
-from .utils import TableInput, make_mean_motion, mod, read_dishas, read_table_input
+from kanon_api.utils import DeferedMeta, initialize
+
+from .dishas import dishas_cache
+from .table_pack import is_packed, referenced_tables
+from .utils import (
+    CompiledTable,
+    ExactTable,
+    TableFunction,
+    TableInput,
+    make_mean_motion,
+    mod,
+    read_table_input,
+)
+
+# Threads loading the components of a table set
+LOAD_THREADS = 8
+
+# Latitudes whose oblique ascension tables are kept by each table set
+MAX_CACHED_LATITUDES = 64
 
 anti_mirror = Symmetry("mirror", sign=-1)
 mirror = Symmetry("mirror")
@@ -165,51 +186,89 @@ def reverse_table(tab: HTable) -> HTable:
 
 class ObliqueAscension(metaclass=DeferedMeta):
     def __init__(self, tables: dict[float, int]):
-        self.tables = {float(k): read_dishas(v) for k, v in tables.items()}
+        self.functions = {float(k): TableFunction(v) for k, v in tables.items()}
+        self.latitudes = sorted(self.functions)
+
+        # Caches are owned by each instance, to be freed with its table set
+        self.interpolated_table = lru_cache(MAX_CACHED_LATITUDES)(
+            self._interpolated_table
+        )
+        self.reversed_table = lru_cache(MAX_CACHED_LATITUDES)(self._reversed_table)
+        self.reversed_exact = lru_cache(MAX_CACHED_LATITUDES)(self._reversed_exact)
+        self.compiled = lru_cache(MAX_CACHED_LATITUDES)(self._compiled)
+        self.reversed_compiled = lru_cache(MAX_CACHED_LATITUDES)(
+            self._reversed_compiled
+        )
+
+    @property
+    def tables(self) -> dict[float, HTable]:
+        return {k: f.table for k, f in self.functions.items()}
 
     def _find_index(self, latitude: float) -> tuple[float, float | None, float]:
-        tab = self.tables
+        latitudes = self.latitudes
 
-        if (
-            (idx := latitude) in tab
-            or latitude < (idx := min(tab))
-            or latitude > (idx := max(tab))
-        ):
-            return idx, None, 0
+        if latitude in self.functions:
+            return latitude, None, 0
+        if latitude < latitudes[0]:
+            return latitudes[0], None, 0
+        if latitude > latitudes[-1]:
+            return latitudes[-1], None, 0
 
-        arr = [x - latitude for x in tab]
+        upper = bisect(latitudes, latitude)
 
-        lower_idx = max(x for x in arr if x < 0) + latitude
-        upper_idx = min(x for x in arr if x > 0) + latitude
+        lower_idx, upper_idx = latitudes[upper - 1], latitudes[upper]
         ratio = (latitude - lower_idx) / (upper_idx - lower_idx)
 
         return lower_idx, upper_idx, ratio
 
     def get(self, longitude: Real, latitude: float) -> BasedQuantity:
 
-        tab = self.tables
+        func = self.functions
 
         lower_idx, upper_idx, ratio = self._find_index(latitude)
 
         if upper_idx is None:
-            return cast(BasedQuantity, tab[lower_idx].get(longitude))
+            return func[lower_idx](longitude)
 
-        lower = cast(BasedQuantity, tab[lower_idx].get(longitude))
-        upper = cast(BasedQuantity, tab[upper_idx].get(longitude))
+        lower = func[lower_idx](longitude)
+        upper = func[upper_idx](longitude)
 
         return lower + ratio * (upper - lower)
 
-    def reverse_get(self, obl_ascension: Real, latitude: float) -> BasedQuantity:
+    def batch(self, longitudes: np.ndarray, latitude: float) -> np.ndarray:
+        """
+        Oblique ascensions, without units, of an array of `BasedReal`
+        longitudes, equal to the values given by `get`.
+        """
 
-        tab = self.tables
+        func = self.functions
 
         lower_idx, upper_idx, ratio = self._find_index(latitude)
 
+        lower = func[lower_idx].batch(longitudes)
+
         if upper_idx is None:
-            return cast(BasedQuantity, reverse_table(tab[lower_idx]).get(obl_ascension))
+            return lower
+
+        upper = func[upper_idx].batch(longitudes)
+
+        return lower + ratio * (upper - lower)
+
+    def _interpolated_table(self, latitude: float) -> HTable:
+        """
+        Table of the oblique ascensions at `latitude`, linearly interpolated
+        between the closest tabulated latitudes.
+        """
 
-        lower_tab = tab[lower_idx]
-        upper_tab = tab[upper_idx]
+        tab = self.functions
+
+        lower_idx, upper_idx, ratio = self._find_index(latitude)
+
+        if upper_idx is None:
+            return tab[lower_idx].table
+
+        lower_tab = tab[lower_idx].table
+        upper_tab = tab[upper_idx].table
 
         interpolated_tab = lower_tab.copy()
 
@@ -217,19 +276,104 @@ class ObliqueAscension(metaclass=DeferedMeta):
 
         interpolated_tab[valcol] += (upper_tab[valcol] - lower_tab[valcol]) * ratio
 
-        return cast(BasedQuantity, reverse_table(interpolated_tab).get(obl_ascension))
+        return interpolated_tab
+
+    def _reversed_table(self, latitude: float) -> HTable:
+        table = reverse_table(self.interpolated_table(latitude))
+        table.freeze()
+        return table
+
+    def _reversed_exact(self, latitude: float) -> ExactTable:
+        return ExactTable.from_table(self.reversed_table(latitude))
+
+    def _compiled(self, latitude: float) -> CompiledTable:
+        """
+        Compiled table of the oblique ascensions at `latitude`, interpolated
+        like `interpolated_table`.
+        """
+        lower_idx, upper_idx, ratio = self._find_index(latitude)
+
+        lower = self.functions[lower_idx].compiled
+
+        if upper_idx is None:
+            return lower
+
+        upper = self.functions[upper_idx].compiled(lower.args)
+
+        return CompiledTable(lower.args, lower.values + (upper - lower.values) * ratio)
+
+    def _reversed_compiled(self, latitude: float) -> CompiledTable:
+        return self.compiled(latitude).inverse()
+
+    def reverse_get(self, obl_ascension: Real, latitude: float) -> BasedQuantity:
+        return cast(BasedQuantity, self.reversed_table(latitude).get(obl_ascension))
+
+    def reverse_batch(self, obl_ascensions: np.ndarray, latitude: float) -> np.ndarray:
+        """
+        Longitudes, without units, of an array of `BasedReal` oblique
+        ascensions, equal to the values given by `reverse_get`.
+        """
+        return self.reversed_exact(latitude).batch(obl_ascensions)
 
 
 class RightAscension(metaclass=DeferedMeta):
     def __init__(self, table: int) -> None:
-        self.table = read_dishas(table)
-        self.rtable = reverse_table(self.table)
+        self.function = TableFunction(table)
+
+    @property
+    def table(self) -> HTable:
+        return self.function.table
+
+    @cached_property
+    def rtable(self) -> HTable:
+        return reverse_table(self.table)
 
     def get(self, longitude: BasedReal) -> BasedQuantity:  # pragma: no cover
-        return mod(self.table.get(mod(longitude + 90)) - 90 * degree)
+        return mod(self.function(mod(longitude + 90)) - 90 * degree)
+
+    @cached_property
+    def rexact(self) -> ExactTable:
+        return ExactTable.from_table(self.rtable)
+
+    @cached_property
+    def rcompiled(self) -> CompiledTable:
+        """
+        Float64 inverse of the table, right ascensions increasing with longitudes.
+        """
+        return self.function.compiled.inverse()
+
+    @cached_property
+    def rtolerance(self) -> float:
+        return 60.0**-self.function.significant * (
+            1 + np.diff(self.rcompiled.args).max()
+        )
+
+    def reverse_get(self, right_ascension: Real) -> BasedQuantity:
+        return self.reverse_batch(np.array([right_ascension], dtype=object))[0] * degree
+
+    def reverse_batch(self, right_ascensions: np.ndarray) -> np.ndarray:
+        """
+        Longitudes, without units, of an array of right ascensions.
+
+        Exact lookups interpolate on the reversed `HTable`, fast ones on the
+        precomputed float inverse of the table.
+        """
+        if settings.TABLE_ENGINE == "fast":
+            keys = (right_ascensions.astype(float) - 90) % 360
+            return self.function._from_floats((self.rcompiled(keys) + 90) % 360)
+
+        keys = (right_ascensions - 90) % 360
+        longitudes = self.rexact.batch(keys)
 
-    def reverse_get(self, right_ascension: BasedReal) -> BasedQuantity:
-        return mod(self.rtable.get(mod(right_ascension - 90)) + 90 * degree)
+        if settings.TABLE_ENGINE == "verify":
+            self.function.verify(
+                keys,
+                longitudes,
+                self.function._from_floats(self.rcompiled(keys.astype(float))),
+                self.rtolerance,
+            )
+
+        return (longitudes + 90) % 360
 
 
 TableComp = CelestialBody | ObliqueAscension | RightAscension
@@ -238,11 +382,16 @@ T = TypeVar("T", bound=TableComp)
 
 
 class TableSet:
-    def __init__(self, file_name: str) -> None:
-        with Path(__file__).parent.joinpath("table_sets", file_name).open(
-            mode="r"
-        ) as f:
+    def __init__(self, path: Path) -> None:
+        self.name = path.stem
+
+        with path.open(mode="r") as f:
             data = json.load(f)
+
+        self.table_ids = referenced_tables(data)
+        if settings.PRODUCTION:
+            self.prefetch()
+
         self.FixedStars = FixedStars(self, **data["FixedStars"])
         self.Sun = Sun(self, **data["Sun"])
         self.Moon = Moon(self, **data["Moon"])
@@ -256,3 +405,70 @@ class TableSet:
 
     def __call__(self, obj: Type[T]) -> T:
         return getattr(self, obj.__name__)
+
+    @property
+    def components(self) -> list[TableComp]:
+        return [
+            self.FixedStars,
+            self.Sun,
+            self.Moon,
+            self.Mars,
+            self.Venus,
+            self.Mercury,
+            self.Saturn,
+            self.Jupiter,
+            self.ObliqueAscension,
+            self.RightAscension,
+        ]
+
+    @property
+    def table_functions(self) -> list[TableFunction]:
+        functions: list[TableFunction] = []
+        for component in self.components:
+            for attr in vars(component).values():
+                if isinstance(attr, dict):
+                    functions.extend(attr.values())
+                elif isinstance(attr, TableFunction):
+                    functions.append(attr)
+        return functions
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Approximate memory used by the tables of the table set.
+        """
+        return sum(function.nbytes for function in self.table_functions)
+
+    def prefetch(self):
+        """
+        Fetches the tables that are neither packed nor cached yet.
+        """
+        dishas_cache.prefetch(i for i in self.table_ids if not is_packed(i))
+
+    def load(self):
+        """
+        Loads the tables of every component, even deferred ones, concurrently.
+
+        Tables of a shared table store are only read if exact lookups are used.
+        """
+        if settings.TABLE_ENGINE != "fast":
+            self.prefetch()
+
+        with ThreadPoolExecutor(LOAD_THREADS) as executor:
+            list(executor.map(initialize, self.components))
+
+            # Right ascension inverses are only built from the compiled table
+            self.RightAscension.rcompiled
+
+            if settings.TABLE_ENGINE != "fast":
+                list(executor.map(TableFunction.load, self.table_functions))
+
+    @property
+    def load_times(self) -> dict[str, float | None]:
+        """
+        Initialization time of every component, if initialized.
+        """
+        return {
+            type(component).__name__: vars(component).get("load_time")
+            for component in self.components
+        }
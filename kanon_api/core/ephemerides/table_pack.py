@@ -0,0 +1,298 @@
+"""
+Binary packs of the DISHAS tables used by table sets.
+
+A pack is an uncompressed `.npz` archive holding every table referenced by a
+table set, with their `BasedReal` arguments and entries stored as digits.
+Tables are read from packs found in `settings.TABLE_PACK_DIR` without any
+network access.
+
+Build a pack with::
+
+    python -m kanon_api.core.ephemerides.table_pack parisian_alphonsine_tables.json
+"""
+
+import argparse
+import io
+import json
+import zipfile
+from pathlib import Path
+from typing import Any, Iterable, Literal, cast
+
+import kanon.units.definitions as definitions
+import numpy as np
+from astropy.units import Unit
+from kanon.tables.htable import HTable
+from kanon.tables.symmetries import Symmetry
+from kanon.units.radices import BasedReal
+from kanon.utils.types.number_types import Real
+
+from kanon_api import settings
+
+from .dishas import dishas_cache
+
+PACK_VERSION = 1
+
+TABLE_SETS_DIR = Path(__file__).parent / "table_sets"
+
+SymmetryType = Literal["mirror", "periodic"]
+
+SYMMETRY_TYPES: list[SymmetryType] = ["mirror", "periodic"]
+
+RADICES: dict[str, type[BasedReal]] = {
+    name: radix
+    for name, radix in vars(definitions).items()
+    if isinstance(radix, type) and issubclass(radix, BasedReal)
+}
+
+
+def referenced_tables(data: Any) -> list[int]:
+    """
+    DISHAS ids of every table referenced in table set data.
+    """
+    if isinstance(data, bool):
+        return []
+    if isinstance(data, int):
+        return [data]
+    if isinstance(data, dict):
+        if "id" in data:
+            return [data["id"]]
+        return sorted({i for v in data.values() for i in referenced_tables(v)})
+    return []
+
+
+class PackWriter:
+    def __init__(self):
+        self.strings: list[str] = []
+        self.numbers: dict[str, list[int]] = {
+            "radix": [],
+            "sign": [],
+            "right": [],
+            "offsets": [0],
+            "digits": [],
+        }
+
+    def string(self, value: str) -> int:
+        if value not in self.strings:
+            self.strings.append(value)
+        return self.strings.index(value)
+
+    def number(self, value: Real) -> int:
+        if not isinstance(value, BasedReal) or value.remainder:
+            raise ValueError(f"Can't pack {value!r}")
+
+        numbers = self.numbers
+        numbers["radix"].append(self.string(type(value).__name__))
+        numbers["sign"].append(value.sign)
+        numbers["right"].append(len(value.right))
+        numbers["digits"].extend(value.left + value.right)
+        numbers["offsets"].append(len(numbers["digits"]))
+
+        return len(numbers["radix"]) - 1
+
+    def unit(self, unit) -> int:
+        return self.string(unit.to_string()) if unit is not None else -1
+
+    def pack(self, tables: dict[int, HTable]) -> dict[str, np.ndarray]:
+        ids = sorted(tables)
+        names, units, row_offsets = [], [], [0]
+        sym_tables, sym_type, sym_offset, sym_sign, sym_source = [], [], [], [], []
+        sym_targets: list[int] = []
+        sym_target_offsets = [0]
+
+        for idx, tab_id in enumerate(ids):
+            table = tables[tab_id]
+            key, values = table.primary_key[0], table.values_column
+
+            names.append([self.string(key), self.string(values)])
+            units.append([self.unit(table[key].unit), self.unit(table[values].unit)])
+
+            for arg, entry in zip(table[key], table[values]):
+                self.number(arg)
+                self.number(entry)
+            row_offsets.append(row_offsets[-1] + len(table))
+
+            for sym in table.symmetry:
+                if int(sym.offset) != sym.offset:
+                    raise ValueError(f"Can't pack {sym!r}")
+                sym_tables.append(idx)
+                sym_type.append(SYMMETRY_TYPES.index(sym.symtype))
+                sym_offset.append(int(sym.offset))
+                sym_sign.append(sym.sign)
+                sym_source.append(
+                    [self.number(x) for x in sym.source] if sym.source else [-1, -1]
+                )
+                sym_targets.extend(self.number(x) for x in sym.targets or [])
+                sym_target_offsets.append(len(sym_targets))
+
+        return {
+            "version": np.array([PACK_VERSION]),
+            "table_ids": np.array(ids, dtype=np.int64),
+            "table_names": np.array(names, dtype=np.int64).reshape(-1, 2),
+            "table_units": np.array(units, dtype=np.int64).reshape(-1, 2),
+            "table_rows": np.array(row_offsets, dtype=np.int64),
+            "strings": np.array(self.strings, dtype=np.str_),
+            "number_radix": np.array(self.numbers["radix"], dtype=np.int16),
+            "number_sign": np.array(self.numbers["sign"], dtype=np.int8),
+            "number_right": np.array(self.numbers["right"], dtype=np.int16),
+            "number_offsets": np.array(self.numbers["offsets"], dtype=np.int64),
+            "number_digits": np.array(self.numbers["digits"], dtype=np.int16),
+            "sym_tables": np.array(sym_tables, dtype=np.int64),
+            "sym_type": np.array(sym_type, dtype=np.int8),
+            "sym_offset": np.array(sym_offset, dtype=np.int64),
+            "sym_sign": np.array(sym_sign, dtype=np.int8),
+            "sym_source": np.array(sym_source, dtype=np.int64).reshape(-1, 2),
+            "sym_targets": np.array(sym_targets, dtype=np.int64),
+            "sym_target_offsets": np.array(sym_target_offsets, dtype=np.int64),
+        }
+
+
+def write_pack(path: Path, arrays: dict[str, np.ndarray]):
+    """
+    Writes arrays as a `.npz` archive whose bytes only depend on the arrays.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as archive:
+        for name in sorted(arrays):
+            buffer = io.BytesIO()
+            np.lib.format.write_array(buffer, arrays[name], allow_pickle=False)
+            archive.writestr(zipfile.ZipInfo(f"{name}.npy"), buffer.getvalue())
+
+
+class TablePack:
+    def __init__(self, path: Path):
+        with np.load(path, allow_pickle=False) as data:
+            self.arrays = {name: data[name] for name in data.files}
+
+        if (version := int(self.arrays["version"][0])) != PACK_VERSION:
+            raise ValueError(f"Unsupported table pack version {version} in {path}")
+
+        self.index = {int(t): i for i, t in enumerate(self.arrays["table_ids"])}
+        self.strings = [str(s) for s in self.arrays["strings"]]
+
+    def __contains__(self, tab_id: int) -> bool:
+        return tab_id in self.index
+
+    def _segment(self, values: str, offsets: str, idx: int) -> np.ndarray:
+        start, end = self.arrays[offsets][idx], self.arrays[offsets][idx + 1]
+        return self.arrays[values][start:end]
+
+    def _number(self, idx: int) -> BasedReal:
+        arr = self.arrays
+        digits = tuple(
+            int(d) for d in self._segment("number_digits", "number_offsets", idx)
+        )
+        split = len(digits) - int(arr["number_right"][idx])
+        radix = RADICES[self.strings[arr["number_radix"][idx]]]
+        return radix(digits[:split], digits[split:], sign=int(arr["number_sign"][idx]))
+
+    def _unit(self, idx: int):
+        return Unit(self.strings[idx]) if idx >= 0 else None
+
+    def _symmetries(self, table_idx: int) -> list[Symmetry]:
+        arr = self.arrays
+        symmetries = []
+        for sym in np.flatnonzero(arr["sym_tables"] == table_idx):
+            source = arr["sym_source"][sym]
+            targets = self._segment("sym_targets", "sym_target_offsets", sym)
+            symmetries.append(
+                Symmetry(
+                    SYMMETRY_TYPES[arr["sym_type"][sym]],
+                    int(arr["sym_offset"][sym]),
+                    sign=cast(Literal[-1, 1], int(arr["sym_sign"][sym])),
+                    source=(self._number(source[0]), self._number(source[1]))
+                    if source[0] >= 0
+                    else None,
+                    targets=[self._number(x) for x in targets] or None,
+                )
+            )
+        return symmetries
+
+    def table(self, tab_id: int) -> HTable:
+        arr = self.arrays
+        idx = self.index[tab_id]
+
+        start, end = arr["table_rows"][idx], arr["table_rows"][idx + 1]
+        args = [self._number(2 * row) for row in range(start, end)]
+        entries = [self._number(2 * row + 1) for row in range(start, end)]
+
+        key, values = (self.strings[i] for i in arr["table_names"][idx])
+
+        return HTable(
+            [args, entries],
+            names=(key, values),
+            index=key,
+            units=[self._unit(i) for i in arr["table_units"][idx]],
+            dtype=[object, object],
+            symmetry=self._symmetries(idx),
+        )
+
+
+_packs: list[TablePack] | None = None
+
+
+def table_packs() -> list[TablePack]:
+    """
+    Packs found in `settings.TABLE_PACK_DIR`, loaded once.
+    """
+    global _packs
+
+    if _packs is None:
+        _packs = [TablePack(p) for p in sorted(settings.TABLE_PACK_DIR.glob("*.npz"))]
+
+    return _packs
+
+
+def is_packed(tab_id: int) -> bool:
+    return any(tab_id in pack for pack in table_packs())
+
+
+def packed_table(tab_id: int) -> HTable | None:
+    """
+    Table `tab_id` from the packs in `settings.TABLE_PACK_DIR`, if any has it.
+    """
+    for pack in table_packs():
+        if tab_id in pack:
+            return pack.table(tab_id)
+
+    return None
+
+
+def build_pack(table_set: Path, output: Path):
+    with table_set.open() as f:
+        data = json.load(f)
+
+    tab_ids = referenced_tables(data)
+    dishas_cache.prefetch(tab_ids)
+
+    tables = {tab_id: dishas_cache.read(tab_id) for tab_id in tab_ids}
+
+    write_pack(output, PackWriter().pack(tables))
+
+
+def main(args: Iterable[str] | None = None):
+    parser = argparse.ArgumentParser(
+        description="Builds table packs from table set files"
+    )
+    parser.add_argument(
+        "table_sets",
+        nargs="+",
+        type=Path,
+        help=f"Table set file, or name of a file in {TABLE_SETS_DIR}",
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        type=Path,
+        default=settings.TABLE_PACK_DIR,
+        help="Directory of the packs, defaults to settings.TABLE_PACK_DIR",
+    )
+    parsed = parser.parse_args(args)
+
+    for table_set in parsed.table_sets:
+        if not table_set.exists():
+            table_set = TABLE_SETS_DIR / table_set
+        build_pack(table_set, parsed.output_dir / f"{table_set.stem}.npz")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
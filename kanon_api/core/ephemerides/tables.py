@@ -1,28 +1,86 @@
-from enum import Enum, EnumMeta
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Iterator
+
+from kanon_api import settings
+from kanon_api.utils import build_safe_dict_resolver
 
 from .table_classes import TableSet
+from .table_pack import TABLE_SETS_DIR
+
+
+class TableSetRegistry(Mapping[str, TableSet]):
+    """
+    Table sets of the `.json` files of a directory, loaded on first use.
+
+    The least recently used table sets are evicted when the loaded ones use
+    more than `max_bytes`, the last one used being always kept.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.paths = {path.stem: path for path in sorted(directory.glob("*.json"))}
+        self.max_bytes = max_bytes
+
+        self.loaded: OrderedDict[str, TableSet] = OrderedDict()
+        self.load_times: dict[str, float] = {}
+        self.evictions = 0
+        self._lock = threading.RLock()
+
+    def __getitem__(self, name: str) -> TableSet:
+        with self._lock:
+            if (table_set := self.loaded.get(name)) is not None:
+                self.loaded.move_to_end(name)
+                return table_set
+
+            start = time.perf_counter()
+
+            table_set = TableSet(self.paths[name])
+            table_set.load()
+
+            self.load_times[name] = time.perf_counter() - start
+            self.loaded[name] = table_set
+            self.evict()
+
+            return table_set
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.paths)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def evict(self):
+        sizes = {name: table_set.nbytes for name, table_set in self.loaded.items()}
+
+        while len(self.loaded) > 1 and sum(sizes.values()) > self.max_bytes:
+            name, _ = self.loaded.popitem(last=False)
+            del sizes[name]
+            self.evictions += 1
+
+    def info(self) -> dict[str, dict]:
+        """
+        Load time, of the whole table set and of each of its components, and
+        resident size of every table set, if loaded.
+        """
+        with self._lock:
+            return {
+                name: {
+                    "loaded": name in self.loaded,
+                    "load_time": self.load_times.get(name),
+                    "bytes": self.loaded[name].nbytes if name in self.loaded else 0,
+                    "components": self.loaded[name].load_times
+                    if name in self.loaded
+                    else {},
+                }
+                for name in self.paths
+            }
+
 
+table_sets = TableSetRegistry(TABLE_SETS_DIR, settings.TABLE_SET_MEMORY)
 
-class KeyEnumMeta(EnumMeta):
-    def __call__(
-        cls, value, names=None, *, module=None, qualname=None, type=None, start=1
-    ):
-        if isinstance(value, str):
-            return getattr(cls, value)
-        return super().__call__(  # pragma: no cover
-            cls,
-            value,
-            names=names,
-            module=module,
-            qualname=qualname,
-            type=type,
-            start=start,
-        )
-
-
-class TableSets(TableSet, Enum, metaclass=KeyEnumMeta):
-    parisian_alphonsine_tables = "parisian_alphonsine_tables.json"
-
-    @property
-    def value(self):
-        return self.name
+safe_table_set_name = build_safe_dict_resolver(
+    {name: name for name in table_sets}, "TableSetName", "table_set"
+)
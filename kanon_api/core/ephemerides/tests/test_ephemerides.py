@@ -1,32 +1,53 @@
+import json
+
+import numpy as np
 import pytest
 from kanon.calendars import Calendar, Date
 from kanon.units import Sexagesimal
 
-from kanon_api.core.ephemerides.ascendant import ascendant
+from kanon_api import settings
+from kanon_api.core.ephemerides import almanac, table_pack, utils
+from kanon_api.core.ephemerides.ascendant import ascendant, ascendant_grid
+from kanon_api.core.ephemerides.dishas import dishas_cache
+from kanon_api.core.ephemerides.events import EventType, find_events
+from kanon_api.core.ephemerides.float_position import (
+    MAX_DEVIATION,
+    ascendant_float,
+    float_pos_batch,
+)
 from kanon_api.core.ephemerides.houses import HouseMethods
+from kanon_api.core.ephemerides.shared import SharedTableStore
 from kanon_api.core.ephemerides.table_classes import (
     Jupiter,
     Mars,
     Mercury,
+    Moon,
     Saturn,
+    Sun,
     Venus,
+    reverse_table,
 )
-from kanon_api.core.ephemerides.tables import TableSets
+from kanon_api.core.ephemerides.table_pack import TABLE_SETS_DIR
+from kanon_api.core.ephemerides.tables import TableSetRegistry, table_sets
 from kanon_api.core.ephemerides.true_position import (
     moon_true_pos,
     planet_true_pos,
     sun_true_pos,
+    true_pos_batch,
 )
+from kanon_api.core.ephemerides.utils import TableFunction, mod
 from kanon_api.units import degree
 
 julian_calendar = Calendar.registry["Julian A.D."]
 
+PAT = table_sets["parisian_alphonsine_tables"]
+
 
 @pytest.mark.parametrize(
     "ts, ymd, result",
     [
-        (TableSets.parisian_alphonsine_tables, (1327, 7, 3), "1,47;18,48"),
-        (TableSets.parisian_alphonsine_tables, (10, 2, 13), "05,22 ; 56,25"),
+        (PAT, (1327, 7, 3), "1,47;18,48"),
+        (PAT, (10, 2, 13), "05,22 ; 56,25"),
     ],
 )
 def test_true_sun(ts, ymd, result):
@@ -39,10 +60,10 @@ def test_true_sun(ts, ymd, result):
 @pytest.mark.parametrize(
     "ts, ymd, result",
     [
-        (TableSets.parisian_alphonsine_tables, (1327, 7, 3), "4,19;35,55"),
-        (TableSets.parisian_alphonsine_tables, (1403, 3, 12), "3,28;15,28"),
-        (TableSets.parisian_alphonsine_tables, (10, 2, 13), "01,14 ; 42,27"),
-        (TableSets.parisian_alphonsine_tables, (1327, 7, 11), "5,57 ; 18,24"),
+        (PAT, (1327, 7, 3), "4,19;35,55"),
+        (PAT, (1403, 3, 12), "3,28;15,28"),
+        (PAT, (10, 2, 13), "01,14 ; 42,27"),
+        (PAT, (1327, 7, 11), "5,57 ; 18,24"),
     ],
 )
 def test_true_moon(ts, ymd, result):
@@ -55,14 +76,14 @@ def test_true_moon(ts, ymd, result):
 @pytest.mark.parametrize(
     "planet, ymd, result",
     [
-        (TableSets.parisian_alphonsine_tables(Mars), (1327, 7, 3), "2,14;52,23"),
-        (TableSets.parisian_alphonsine_tables(Mars), (10, 2, 13), "05,40 ; 42,26"),
-        (TableSets.parisian_alphonsine_tables(Saturn), (1327, 7, 3), "1,47;5,1"),
-        (TableSets.parisian_alphonsine_tables(Jupiter), (1327, 7, 3), "2,14;35,29"),
-        (TableSets.parisian_alphonsine_tables(Mercury), (1327, 7, 3), "2,13;5,1"),
-        (TableSets.parisian_alphonsine_tables(Venus), (1327, 7, 3), "2,1;27,13"),
-        (TableSets.parisian_alphonsine_tables(Venus), (7, 2, 23), "01 ; 07,13"),
-        (TableSets.parisian_alphonsine_tables(Mercury), (7, 3, 26), "05,38 ; 38,43"),
+        (PAT(Mars), (1327, 7, 3), "2,14;52,23"),
+        (PAT(Mars), (10, 2, 13), "05,40 ; 42,26"),
+        (PAT(Saturn), (1327, 7, 3), "1,47;5,1"),
+        (PAT(Jupiter), (1327, 7, 3), "2,14;35,29"),
+        (PAT(Mercury), (1327, 7, 3), "2,13;5,1"),
+        (PAT(Venus), (1327, 7, 3), "2,1;27,13"),
+        (PAT(Venus), (7, 2, 23), "01 ; 07,13"),
+        (PAT(Mercury), (7, 3, 26), "05,38 ; 38,43"),
     ],
 )
 def test_planet_true_pos(planet, ymd, result):
@@ -72,16 +93,244 @@ def test_planet_true_pos(planet, ymd, result):
     assert round(res.value, 2) == Sexagesimal(result)
 
 
+@pytest.mark.parametrize("body", [Sun, Moon, Mars, Jupiter, Saturn, Venus, Mercury])
+def test_true_pos_batch(body):
+    ts = table_sets["parisian_alphonsine_tables"]
+    start = Date(julian_calendar, (1327, 7, 3)).days_from_epoch()
+    days = [start + i * 37.25 for i in range(-5, 6)]
+
+    planet = ts(body)
+
+    if body is Sun:
+        expected = [sun_true_pos(ts, d).value for d in days]
+    elif body is Moon:
+        expected = [moon_true_pos(ts, d).value for d in days]
+    else:
+        expected = [planet_true_pos(d, planet).value for d in days]
+
+    assert list(true_pos_batch(planet, days)) == expected
+
+
+def angular_distance(a, b) -> np.ndarray:
+    return np.abs((np.asarray(a) - np.asarray(b) + 180) % 360 - 180)
+
+
+@pytest.mark.parametrize("body", [Sun, Moon, Mars, Jupiter, Saturn, Venus, Mercury])
+def test_float_pos_batch(body):
+    ts = table_sets["parisian_alphonsine_tables"]
+    start = Date(julian_calendar, (1327, 7, 3)).days_from_epoch()
+    days = [start + i * 97.75 for i in range(-100, 100)]
+
+    planet = ts(body)
+
+    expected = [float(pos) for pos in true_pos_batch(planet, days)]
+
+    assert angular_distance(float_pos_batch(planet, days), expected).max() < (
+        MAX_DEVIATION
+    )
+
+
+@pytest.mark.parametrize("start, step", [(-109516, 3), (484380, 1), (511044, 37)])
+def test_mean_motion_series(start, step):
+    ts = table_sets["parisian_alphonsine_tables"]
+    days = [float(start + i * step) for i in range(40)]
+
+    motions = [
+        ts.FixedStars.mean_motion,
+        ts.FixedStars.access_recess_mm,
+        ts.Sun.mean_motion,
+        ts.Moon.mean_motion,
+        ts.Moon.mean_argument,
+        *(ts(body).mean_motion for body in (Mars, Jupiter, Saturn, Venus, Mercury)),
+        ts.Venus.mean_argument,
+        ts.Mercury.mean_argument,
+    ]
+
+    for motion in motions:
+        expected = [motion(d).value for d in days]
+        for positions in (motion.series(start, step, len(days)), motion.batch(days)):
+            assert [(str(p), p.remainder, p.significant) for p in positions] == [
+                (str(p), p.remainder, p.significant) for p in expected
+            ]
+
+    with pytest.raises(ValueError):
+        ts.Sun.mean_motion.series(start + 0.5, step, 3)
+
+
+def test_compiled_table():
+    table = table_sets["parisian_alphonsine_tables"].FixedStars.access_recess_eq
+    args = table.compiled.args
+
+    keys = np.concatenate([args, (args[1:] + args[:-1]) / 2, [args[0] - 1]])
+    expected = [
+        float(table.table.get(Sexagesimal.from_float(k, 2)).value) for k in keys
+    ]
+
+    assert np.allclose(table.compiled(keys), expected, atol=table.tolerance)
+
+
+@pytest.mark.parametrize("engine", ["fast", "verify"])
+def test_table_engines(engine, monkeypatch):
+    ts = table_sets["parisian_alphonsine_tables"]
+    start = Date(julian_calendar, (1327, 7, 3)).days_from_epoch()
+    days = [start + i * 37.25 for i in range(-5, 6)]
+
+    bodies = [ts(b) for b in (Sun, Moon, Mars, Jupiter, Saturn, Venus, Mercury)]
+    exact = [true_pos_batch(body, days).astype(float) for body in bodies]
+
+    monkeypatch.setattr(settings, "TABLE_ENGINE", engine)
+
+    for body, expected in zip(bodies, exact):
+        deviation = np.abs(true_pos_batch(body, days).astype(float) - expected)
+        assert (np.minimum(deviation, 360 - deviation) < 60**-1).all()
+
+    assert float(sun_true_pos(ts, start).value) == pytest.approx(exact[0][5], abs=1e-2)
+
+
+def test_shared_table_store(monkeypatch):
+    ts = table_sets["parisian_alphonsine_tables"]
+
+    store = SharedTableStore.create(
+        {function.key: function.shared_table for function in ts.table_functions}
+    )
+    attached = SharedTableStore.attach(store.handle)
+
+    monkeypatch.setattr(utils, "shared_tables", attached.tables)
+
+    original = ts.Sun.equation
+    function = TableFunction(original.tab_id, original.symmetry)
+
+    assert function._table is None
+    assert np.shares_memory(
+        function.compiled.values, np.frombuffer(attached.memory.buf, dtype=np.uint8)
+    )
+
+    key = Sexagesimal("2,3;45,6")
+
+    monkeypatch.setattr(settings, "TABLE_ENGINE", "fast")
+    assert function(key).value == original(key).value
+    assert function._table is None
+
+    monkeypatch.setattr(settings, "TABLE_ENGINE", "exact")
+    assert function(key).value == original(key).value
+    assert function._table is not None
+
+    store.unlink()
+
+
+def test_table_pack(tmp_path, monkeypatch):
+    ids = [238, 19]
+    tables = {tab_id: dishas_cache.read(tab_id) for tab_id in ids}
+
+    path = tmp_path / "pack.npz"
+    table_pack.write_pack(path, table_pack.PackWriter().pack(tables))
+    content = path.read_bytes()
+    table_pack.write_pack(path, table_pack.PackWriter().pack(tables))
+    assert path.read_bytes() == content
+
+    pack = table_pack.TablePack(path)
+    for tab_id, table in tables.items():
+        packed = pack.table(tab_id)
+        assert packed.colnames == table.colnames
+        assert packed.symmetry == table.symmetry
+        for name in table.colnames:
+            assert packed[name].unit == table[name].unit
+            assert list(packed[name]) == list(table[name])
+
+    monkeypatch.setattr(settings, "TABLE_PACK_DIR", tmp_path)
+    monkeypatch.setattr(table_pack, "_packs", None)
+    monkeypatch.setattr(utils, "dishas_cache", None)
+
+    assert list(utils.read_dishas(238)["Entries"]) == list(tables[238]["Entries"])
+
+
+def test_almanac(tmp_path, monkeypatch):
+    ts = table_sets["parisian_alphonsine_tables"]
+    start = Date(julian_calendar, (1327, 7, 3))
+    days = start.days_from_epoch()
+
+    almanac.build_almanac(
+        ts.name, start.jdn, start.jdn + 20, tmp_path / f"{ts.name}.npy", 1
+    )
+
+    monkeypatch.setattr(settings, "ALMANAC_DIR", tmp_path)
+    monkeypatch.setattr(almanac, "_almanacs", {})
+
+    table = almanac.almanac(ts.name)
+    assert table is not None
+
+    for body in (Sun, Moon, Mercury):
+        expected = [str(round(p, 2)) for p in true_pos_batch(ts(body), [days + 7])]
+        assert table.get(body.__name__, days + 7) == expected[0]
+
+    assert table.get("Sun", days - 1) is None
+    assert table.get("Sun", days + 20) is None
+    assert table.get("Sun", days + 7.5) is None
+
+    monkeypatch.setattr(settings, "TABLE_ENGINE", "fast")
+
+    interpolated = table.get("Sun", days + 7.5)
+    assert interpolated is not None
+    exact = float(sun_true_pos(ts, days + 7.5).value)
+    assert float(Sexagesimal(interpolated)) == pytest.approx(exact, abs=60**-1)
+
+
+def test_outdated_almanac(tmp_path, monkeypatch):
+    ts = table_sets["parisian_alphonsine_tables"]
+    start = Date(julian_calendar, (1327, 7, 3))
+    path = tmp_path / f"{ts.name}.npy"
+
+    almanac.build_almanac(ts.name, start.jdn, start.jdn + 2, path, 1)
+
+    monkeypatch.setattr(settings, "ALMANAC_DIR", tmp_path)
+    monkeypatch.setattr(almanac, "_almanacs", {})
+    assert almanac.almanac(ts.name) is not None
+
+    meta = json.loads(path.with_suffix(".json").read_text())
+    meta["tables_version"] = "0" * 64
+    path.with_suffix(".json").write_text(json.dumps(meta))
+
+    monkeypatch.setattr(almanac, "_almanacs", {})
+    assert almanac.almanac(ts.name) is None
+
+
+@pytest.mark.parametrize("latitude", [10.0, 16.0, 31.0, 39.85, 45.0, 60.0])
+def test_oblique_ascension_tables(latitude):
+    oblique_ascension = table_sets["parisian_alphonsine_tables"].ObliqueAscension
+
+    lower, upper, ratio = oblique_ascension._find_index(latitude)
+    latitudes = oblique_ascension.latitudes
+    if upper is None:
+        assert lower == min(latitudes, key=lambda x: abs(x - latitude))
+    else:
+        assert lower < latitude < upper
+        assert latitudes.index(upper) == latitudes.index(lower) + 1
+        assert ratio == (latitude - lower) / (upper - lower)
+
+    table = oblique_ascension.interpolated_table(latitude)
+    assert oblique_ascension.interpolated_table(latitude) is table
+    reversed_table = reverse_table(table.copy())
+
+    for degrees in range(5, 355, 25):
+        obl_ascension = Sexagesimal.from_float(degrees + 0.2925, 2)
+        value = oblique_ascension.reverse_get(obl_ascension, latitude)
+        expected = reversed_table.get(obl_ascension)
+        assert (str(value), value.value.remainder) == (
+            str(expected),
+            expected.value.remainder,
+        )
+
+
 @pytest.mark.parametrize(
     "ts, date, hours, latitude, result",
     [
-        (TableSets.parisian_alphonsine_tables, (1327, 7, 3), 0.5, 31, "03,16 ; 11,46"),
-        (TableSets.parisian_alphonsine_tables, (1327, 7, 3), 0.6, 31, "03,46 ; 35,49"),
-        (TableSets.parisian_alphonsine_tables, (10, 2, 13), 0.5, 43, "01,19 ; 51,41"),
-        (TableSets.parisian_alphonsine_tables, (10, 2, 13), 0.5, 30, "01,10 ; 55,27"),
-        (TableSets.parisian_alphonsine_tables, (10, 2, 13), 0.5, 10, "01,03 ; 44,16"),
-        (TableSets.parisian_alphonsine_tables, (10, 2, 13), 0.5, 49, "01,25 ; 05,16"),
-        (TableSets.parisian_alphonsine_tables, (10, 2, 13), 0.5, 48, "01,25 ; 05,16"),
+        (PAT, (1327, 7, 3), 0.5, 31, "03,16 ; 11,46"),
+        (PAT, (1327, 7, 3), 0.6, 31, "03,46 ; 35,49"),
+        (PAT, (10, 2, 13), 0.5, 43, "01,19 ; 51,41"),
+        (PAT, (10, 2, 13), 0.5, 30, "01,10 ; 55,27"),
+        (PAT, (10, 2, 13), 0.5, 10, "01,03 ; 44,16"),
+        (PAT, (10, 2, 13), 0.5, 49, "01,25 ; 05,16"),
+        (PAT, (10, 2, 13), 0.5, 48, "01,25 ; 05,16"),
     ],
 )
 def test_ascendant(ts, date, hours, latitude, result):
@@ -92,29 +341,57 @@ def test_ascendant(ts, date, hours, latitude, result):
     assert round(Sexagesimal(degree_ascension.value, 2), 2) == Sexagesimal(result)
 
 
+@pytest.mark.parametrize("latitude", [31, 40.3, 48.85])
+def test_ascendant_float(latitude):
+    ts = table_sets["parisian_alphonsine_tables"]
+    start = Date(julian_calendar, (1327, 7, 3), 0).days_from_epoch()
+    days = [start + i * 11.3 for i in range(50)]
+
+    expected = [float(ascendant(ts, d, latitude).value) for d in days]
+
+    assert angular_distance(ascendant_float(ts, days, latitude), expected).max() < (
+        MAX_DEVIATION
+    )
+
+
+def test_ascendant_grid():
+    ts = table_sets["parisian_alphonsine_tables"]
+    start = Date(julian_calendar, (1327, 7, 3), 0).days_from_epoch()
+    days = [start + i / 24 for i in range(0, 48, 7)]
+    latitudes = [16.0, 31.0, 39.85, 55.0]
+
+    grid = ascendant_grid(ts, days, latitudes)
+
+    for row, d in enumerate(days):
+        for column, latitude in enumerate(latitudes):
+            expected = ascendant(ts, d, latitude).value
+            value = grid[row, column]
+            assert (str(value), value.remainder) == (str(expected), expected.remainder)
+
+
 @pytest.mark.parametrize(
     "ts, method, result2, result8",
     [
         (
-            TableSets.parisian_alphonsine_tables,
+            PAT,
             HouseMethods.M1,
             "05,04 ; 52",
             "02,04 ; 52",
         ),
         (
-            TableSets.parisian_alphonsine_tables,
+            PAT,
             HouseMethods.M2,
             "05,05 ; 27",
             "02,06 ; 56",
         ),
         (
-            TableSets.parisian_alphonsine_tables,
+            PAT,
             HouseMethods.M5,
             "04,56 ; 50",
             "01,56 ; 50",
         ),
         (
-            TableSets.parisian_alphonsine_tables,
+            PAT,
             HouseMethods.M6,
             "04,56 ; 38",
             "01,56 ; 38",
@@ -127,3 +404,93 @@ def test_houses(ts, method: HouseMethods, result2, result8):
     assert len(houses) == 12
     assert round(houses[2]) == Sexagesimal(result2)
     assert round(houses[8]) == Sexagesimal(result8)
+
+
+def test_houses_compare():
+    ts = table_sets["parisian_alphonsine_tables"]
+    asc = (236 + Sexagesimal("0;38")) * degree
+    latitude = float(Sexagesimal("39;51"))
+
+    houses = HouseMethods.compare(ts, asc, latitude)
+
+    assert list(houses) == [method.name for method in HouseMethods]
+    for method in HouseMethods:
+        expected = method(ts, asc, latitude)
+        assert [(str(x), x.remainder) for x in houses[method.name]] == [
+            (str(x), x.remainder) for x in expected
+        ]
+
+    a1 = ts.RightAscension.reverse_get(asc.value).value
+    assert list(houses["M5"][1:]) == [
+        ts.RightAscension.reverse_get(mod(a1 + offset + 30)).value
+        for offset in range(0, 330, 30)
+    ]
+
+
+@pytest.mark.parametrize("engine", ["fast", "verify"])
+def test_right_ascension_inverse(engine, monkeypatch):
+    right_ascension = table_sets["parisian_alphonsine_tables"].RightAscension
+    values = np.array(
+        [Sexagesimal.from_float(v, 2) for v in np.linspace(0, 359.5, 97)],
+        dtype=object,
+    )
+    exact = right_ascension.reverse_batch(values).astype(float)
+
+    monkeypatch.setattr(settings, "TABLE_ENGINE", engine)
+
+    deviation = np.abs(right_ascension.reverse_batch(values).astype(float) - exact)
+    assert (np.minimum(deviation, 360 - deviation) < right_ascension.rtolerance).all()
+    assert float(right_ascension.reverse_get(values[40]).value) == pytest.approx(
+        exact[40], abs=right_ascension.rtolerance
+    )
+
+    with pytest.raises(ValueError):
+        utils.CompiledTable(np.arange(3.0), np.array([0.0, 2.0, 1.0])).inverse()
+
+
+def test_find_events():
+    ts = table_sets["parisian_alphonsine_tables"]
+    start = Date(julian_calendar, (1327, 7, 3)).days_from_epoch()
+
+    events = find_events(
+        ts, start, start + 30, 1, [EventType.CONJUNCTION], [Sun, Moon, Mars]
+    )
+
+    assert [event.bodies for event in events] == [(Sun, Moon), (Moon, Mars)]
+
+    for event in events:
+        first, second = (
+            float(true_pos_batch(ts(body), [event.days])[0]) for body in event.bodies
+        )
+        assert first == pytest.approx(second, abs=60**-1)
+        assert float(event.longitude) == pytest.approx(first, abs=60**-1)
+
+
+def test_table_set_registry(tmp_path):
+    for name in ("first", "second"):
+        (tmp_path / f"{name}.json").write_text(
+            (TABLE_SETS_DIR / "parisian_alphonsine_tables.json").read_text()
+        )
+
+    registry = TableSetRegistry(tmp_path, max_bytes=2**40)
+    assert list(registry) == ["first", "second"]
+    assert not any(info["loaded"] for info in registry.info().values())
+
+    first = registry["first"]
+    assert first.name == "first"
+    assert registry["first"] is first
+    assert registry.info()["first"]["bytes"] == first.nbytes > 0
+
+    registry.max_bytes = first.nbytes
+    second = registry["second"]
+
+    assert list(registry.loaded) == ["second"]
+    assert registry.evictions == 1
+    assert registry["first"] is not first
+    assert list(registry.loaded) == ["first"]
+    assert registry.info()["second"]["load_time"] > 0
+
+    with pytest.raises(KeyError):
+        registry["third"]
+
+    assert str(second.Sun.mean_motion(0)) == str(first.Sun.mean_motion(0))
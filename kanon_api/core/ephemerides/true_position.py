@@ -1,6 +1,18 @@
+from functools import cached_property
+from typing import Sequence
+
+import numpy as np
 from kanon.units.radices import BasedQuantity
 
-from .table_classes import InferiorPlanet, SuperiorPlanet, TableSet
+from .table_classes import (
+    CelestialBody,
+    InferiorPlanet,
+    Moon,
+    Planet,
+    Sun,
+    SuperiorPlanet,
+    TableSet,
+)
 from .utils import mod
 
 
@@ -74,3 +86,143 @@ def planet_true_pos(days: float, planet: SuperiorPlanet) -> BasedQuantity:
         equation_of_argument *= -1
 
     return mod(equation_of_argument + center_equation + mean_pos)
+
+
+class SharedTerms:
+    """
+    Terms of the true positions shared by the bodies of a table set, computed
+    once for every value of `days`.
+    """
+
+    def __init__(self, table_set: TableSet, days: Sequence[float]):
+        self.table_set = table_set
+        self.days = np.asarray(days, dtype=float)
+
+    @cached_property
+    def fixed_stars_pos(self) -> np.ndarray:
+        """
+        Mean fixed stars position with the access and recess equation.
+        """
+        fixed_stars = self.table_set.FixedStars
+
+        mean_fixed_star_pos = fixed_stars.mean_motion.batch(self.days)
+        access_recess_pos = fixed_stars.access_recess_mm.batch(self.days)
+
+        eq_access_recess = fixed_stars.access_recess_eq.batch(access_recess_pos)
+
+        return mean_fixed_star_pos + eq_access_recess
+
+    @cached_property
+    def mean_sun_pos(self) -> np.ndarray:
+        return self.table_set.Sun.mean_motion.batch(self.days)
+
+    def mean_pos(self, body: CelestialBody) -> np.ndarray:
+        if body.mean_motion is self.table_set.Sun.mean_motion:
+            return self.mean_sun_pos
+        return body.mean_motion.batch(self.days)
+
+
+def apogee_batch(planet: Planet, terms: SharedTerms) -> np.ndarray:
+    return terms.fixed_stars_pos + planet.apogee_radix.value
+
+
+def sun_true_pos_batch(terms: SharedTerms) -> np.ndarray:
+    sun = terms.table_set.Sun
+
+    mean_sun_pos = terms.mean_sun_pos
+
+    mean_arg_sun = mean_sun_pos - apogee_batch(sun, terms)
+
+    eq_sun = sun.equation.batch(mean_arg_sun % 360)
+
+    return (mean_sun_pos - eq_sun) % 360
+
+
+def moon_true_pos_batch(terms: SharedTerms) -> np.ndarray:
+    moon = terms.table_set.Moon
+
+    mean_moon_pos = terms.mean_pos(moon)
+    mean_sun_pos = terms.mean_sun_pos
+    mean_arg = moon.mean_argument.batch(terms.days)
+
+    moon_center = ((mean_moon_pos - mean_sun_pos) * 2) % 360
+
+    center_eq = moon.equation_center.batch(moon_center)
+
+    min_prop = moon.minuta_proportionalia.batch(moon_center) >> 1
+
+    true_arg = mean_arg + center_eq
+
+    temp_eq_arg = moon.equation_arg.batch(true_arg)
+
+    moon_diameter = moon.diameter_diversion.batch(true_arg) * min_prop
+
+    equation_of_argument = abs(temp_eq_arg) + moon_diameter
+
+    negative = true_arg < 180
+    equation_of_argument[negative] *= -1
+
+    return (mean_moon_pos + equation_of_argument) % 360
+
+
+def planet_true_pos_batch(terms: SharedTerms, planet: SuperiorPlanet) -> np.ndarray:
+    mean_pos = terms.mean_pos(planet)
+
+    apogee = apogee_batch(planet, terms)
+
+    mean_center = (mean_pos - apogee) % 360
+
+    mean_arg: np.ndarray
+    if isinstance(planet, InferiorPlanet):
+        mean_arg = planet.mean_argument.batch(terms.days)
+    else:
+        mean_arg = (terms.mean_sun_pos - mean_pos) % 360
+
+    center_equation = planet.center_equation.batch(mean_center)
+
+    true_center = center_equation + mean_center
+    true_arg = mean_arg - center_equation
+
+    min_prop = planet.min_prop.batch(true_center) >> 1
+
+    temp_eq_arg = planet.arg_equation.batch(true_arg)
+
+    propior = min_prop > 0
+
+    diversity = np.empty(len(terms.days), dtype=object)
+    diversity[propior] = planet.long_propior.batch(true_arg[propior])
+    diversity[~propior] = planet.long_longior.batch(true_arg[~propior])
+
+    diameter = diversity * min_prop
+
+    equation_of_argument = abs(temp_eq_arg) + diameter
+
+    negative = true_arg > 180
+    equation_of_argument[negative] *= -1
+
+    return (equation_of_argument + center_equation + mean_pos) % 360
+
+
+def true_pos_batch(
+    body: CelestialBody, days: Sequence[float], terms: SharedTerms | None = None
+) -> np.ndarray:
+    """
+    True positions of `body`, without units, for every value of `days`.
+
+    Gives the same values as the single date functions. `terms` can be shared
+    between the bodies of a table set for the same `days`.
+    """
+
+    if terms is None:
+        terms = SharedTerms(body.tset, days)
+
+    if isinstance(body, Sun):
+        return sun_true_pos_batch(terms)
+
+    if isinstance(body, Moon):
+        return moon_true_pos_batch(terms)
+
+    if isinstance(body, SuperiorPlanet):
+        return planet_true_pos_batch(terms, body)
+
+    raise NotImplementedError
@@ -1,13 +1,22 @@
-from typing import Callable, Literal, Protocol, TypeVar, cast, runtime_checkable
+import sys
+from itertools import chain
+from typing import Iterable, Literal, TypeVar, cast
 
+import numpy as np
+from astropy.units import Quantity, Unit, UnitBase
 from kanon.tables.htable import HTable
 from kanon.tables.symmetries import Symmetry
 from kanon.units import Sexagesimal
 from kanon.units.radices import BasedQuantity, BasedReal
 from kanon.utils.types.number_types import Real
 
+from kanon_api import settings
 from kanon_api.units import degree
 
+from .dishas import dishas_cache
+from .shared import SharedTable, shared_tables
+from .table_pack import packed_table
+
 BasedType = TypeVar("BasedType", BasedReal, BasedQuantity)
 
 
@@ -15,32 +24,281 @@ def mod(value: BasedType, divisor: int = 360) -> BasedType:
     return value % (divisor * (value.unit if isinstance(value, BasedQuantity) else 1))
 
 
+def based_size(value: BasedReal) -> int:
+    return sys.getsizeof(value) + sys.getsizeof(value.left) + sys.getsizeof(value.right)
+
+
 def read_dishas(tab_id: int) -> HTable:
-    table: HTable = HTable.read(tab_id)
+    table: HTable | None = packed_table(tab_id)
+    if table is None:
+        table = dishas_cache.read(tab_id)
     table[table.values_column] = table[table.values_column].astype(Sexagesimal)
     table.freeze()
     return table
 
 
-@runtime_checkable
-class RealToBasedQuantity(Protocol):
-    def __call__(self, _v: Real) -> BasedQuantity:
-        ...
+class TableVerificationError(ValueError):
+    pass
+
+
+class CompiledTable:
+    """
+    Float64 arguments and values of a frozen `HTable`, symmetries included,
+    with linear interpolation over arrays of keys.
+    """
+
+    def __init__(self, args: np.ndarray, values: np.ndarray):
+        self.args = args
+        self.values = values
+        self.slopes = np.diff(values) / np.diff(args)
+
+    @classmethod
+    def from_based(
+        cls, keys: list[BasedReal], values: list[BasedReal]
+    ) -> "CompiledTable":
+        return cls(
+            np.array([float(k) for k in keys]), np.array([float(v) for v in values])
+        )
+
+    def __call__(self, keys: np.ndarray | float) -> np.ndarray:
+        keys = np.asarray(keys, dtype=float)
+        idx = np.clip(
+            np.searchsorted(self.args, keys, side="right") - 1, 0, len(self.args) - 2
+        )
+        return self.values[idx] + self.slopes[idx] * (keys - self.args[idx])
+
+    def inverse(self) -> "CompiledTable":
+        """
+        Table of the arguments against the values, which must be increasing.
+        """
+        if not np.all(np.diff(self.values) > 0):
+            raise ValueError("Can't invert a table with non increasing values")
+        return CompiledTable(self.values, self.args)
+
+
+class ExactTable:
+    """
+    Linear interpolation over the `BasedReal` arguments and values of a frozen
+    `HTable`, giving the same results as `HTable.get`, over arrays of keys.
+    """
+
+    def __init__(self, keys: list[BasedReal], values: list[BasedReal]):
+        self.keys = keys
+        self.values = values
+        self.entries = dict(zip(keys, values))
+        self.args = np.array([float(k) for k in keys])
+
+        self._slopes: dict[int, BasedReal] = {}
+
+    @classmethod
+    def from_table(cls, table: HTable) -> "ExactTable":
+        df = table.to_pandas()
+        return cls(list(df.index), list(df.iloc[:, 0]))
+
+    def _slope(self, idx: int) -> BasedReal:
+        if (slope := self._slopes.get(idx)) is None:
+            slope = (self.values[idx + 1] - self.values[idx]) / (
+                self.keys[idx + 1] - self.keys[idx]
+            )
+            self._slopes[idx] = slope
+        return slope
+
+    def _interpolate(self, key: BasedReal, idx: int) -> BasedReal:
+        if key in self.entries:
+            return self.entries[key]
+
+        keys = self.keys
+
+        while idx > 0 and keys[idx - 1] > key:
+            idx -= 1
+        while idx < len(keys) and keys[idx] < key:
+            idx += 1
+
+        lower_idx = min(max(idx - 1, 0), len(keys) - 2)
+
+        return self._slope(lower_idx) * (key - keys[lower_idx]) + self.values[lower_idx]
+
+    def batch(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Interpolated values, without units, of an array of `BasedReal` keys.
+        """
+        indices = np.searchsorted(self.args, keys.astype(float))
+        return np.array(
+            [self._interpolate(k, int(i)) for k, i in zip(keys, indices)],
+            dtype=object,
+        )
+
+
+class TableFunction:
+    """
+    Linear interpolation on a frozen DISHAS table, giving the same results as
+    `HTable.get`, with a `batch` variant working on arrays of keys.
+
+    Lookups go through the compiled float64 table when `settings.TABLE_ENGINE`
+    is `"fast"`, and are checked against it when it is `"verify"`.
+
+    When the table is in a shared table store, the compiled table is a view on
+    it and the `HTable` is only read on the first exact lookup.
+    """
+
+    def __init__(self, tab_id: int, symmetry: list[Symmetry] | None = None):
+        self.tab_id = tab_id
+        self.symmetry = symmetry
+        self.key = f"{tab_id}{symmetry or ''}"
+
+        self._table: HTable | None = None
+
+        if shared := shared_tables.get(self.key):
+            self._compile(
+                CompiledTable(shared.args, shared.values),
+                shared.significant,
+                Unit(shared.unit) if shared.unit else 1,
+                Unit(shared.key_unit) if shared.key_unit else None,
+            )
+        else:
+            self.load()
+
+    def _compile(
+        self, compiled: CompiledTable, significant: int, unit: Unit | int, key_unit
+    ):
+        self.compiled = compiled
+        self.significant = significant
+        self.unit = unit
+        self.key_unit = key_unit
+
+        # Exact lookups truncate the interpolation slope to the tabulated
+        # precision, fast ones round their result to it
+        self.tolerance = 60.0**-significant * (1 + np.diff(compiled.args).max())
+
+    def load(self):
+        """
+        Reads the `HTable`, if not already done.
+        """
+        if self._table is not None:
+            return
+
+        table = read_dishas(self.tab_id)
+        if self.symmetry:
+            table.symmetry = self.symmetry
+        table.freeze()
 
+        self.exact = ExactTable.from_table(table)
 
-def basedstatic(func: Callable) -> RealToBasedQuantity:
-    return cast(RealToBasedQuantity, staticmethod(func))
+        if not hasattr(self, "compiled"):
+            self._compile(
+                CompiledTable(
+                    self.exact.args, np.array(self.exact.values, dtype=float)
+                ),
+                max(v.significant for v in self.exact.values),
+                table.columns[table.values_column].unit or 1,
+                table[table.primary_key[0]].unit,
+            )
+
+        self._table = table
+
+    @property
+    def table(self) -> HTable:
+        self.load()
+        return cast(HTable, self._table)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Approximate memory used by the tables, shared memory excluded.
+        """
+        size = 0
+        if self.key not in shared_tables:
+            size += self.compiled.args.nbytes + self.compiled.values.nbytes
+        if self._table is not None:
+            size += sum(
+                based_size(x) for x in chain(self.exact.keys, self.exact.values)
+            )
+        return size
+
+    @property
+    def shared_table(self) -> SharedTable:
+        return SharedTable(
+            self.compiled.args,
+            self.compiled.values,
+            self.significant,
+            str(self.unit) if isinstance(self.unit, UnitBase) else "",
+            str(self.key_unit) if self.key_unit else "",
+        )
+
+    def __call__(self, key: Real) -> BasedQuantity:
+        if settings.TABLE_ENGINE == "exact":
+            return cast(BasedQuantity, self.table.get(key))
+
+        if isinstance(key, Quantity):
+            key = key.to(self.key_unit).value
+
+        fast = self._from_floats(self.compiled(float(key)))
+
+        if settings.TABLE_ENGINE == "verify":
+            exact = cast(BasedQuantity, self.table.get(key))
+            self.verify(
+                np.array([key], dtype=object),
+                np.array([exact.value], dtype=object),
+                fast,
+            )
+            return exact
+
+        return fast[0] * self.unit
+
+    def _from_floats(self, values: np.ndarray) -> np.ndarray:
+        return np.array(
+            [
+                Sexagesimal.from_float(v, self.significant)
+                for v in np.atleast_1d(values)
+            ],
+            dtype=object,
+        )
+
+    def verify(
+        self,
+        keys: np.ndarray,
+        exact: np.ndarray,
+        fast: np.ndarray,
+        tolerance: float | None = None,
+    ):
+        """
+        Raises a `TableVerificationError` if fast and exact results deviate
+        by more than `tolerance`, defaulting to the one of the table.
+        """
+        if not len(keys):
+            return
+
+        deviation = np.abs(exact.astype(float) - fast.astype(float))
+        worst = int(np.argmax(deviation))
+
+        if deviation[worst] > (tolerance or self.tolerance):
+            raise TableVerificationError(
+                f"Fast lookup of {keys[worst]} deviates by {deviation[worst]}"
+            )
+
+    def batch(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Interpolated values, without units, of an array of `BasedReal` keys.
+        """
+        float_keys = keys.astype(float)
+
+        if settings.TABLE_ENGINE == "fast":
+            return self._from_floats(self.compiled(float_keys))
+
+        self.load()
+
+        exact = self.exact.batch(keys)
+
+        if settings.TABLE_ENGINE == "verify":
+            self.verify(keys, exact, self._from_floats(self.compiled(float_keys)))
+
+        return exact
 
 
 def read_from_table(
     tab_id: int, symmetry: list[Symmetry] | None = None
-) -> RealToBasedQuantity:
-
-    table = read_dishas(tab_id)
-    if symmetry:
-        table.symmetry = symmetry
-    table.freeze()
-    return basedstatic(table.get)
+) -> TableFunction:
+    return TableFunction(tab_id, symmetry)
 
 
 def build_symmetry(
@@ -66,11 +324,63 @@ def read_table_input(table_input: TableInput):
     return read_from_table(table_id, symmetries)
 
 
-def make_mean_motion(raw_input: tuple[str, str]):
+class MeanMotion:
+    def __init__(self, raw_input: tuple[str, str]):
+        self.motion = Sexagesimal(raw_input[0])
+        self.radix = Sexagesimal(raw_input[1])
+
+        self.motion_float = float(self.motion)
+        self.radix_float = float(self.radix)
+
+    def __call__(self, days: float) -> BasedQuantity:
+        return mod(self.motion * days + self.radix) * degree
+
+    def floats(self, days: np.ndarray) -> np.ndarray:
+        """
+        Mean positions, in float64 degrees, for each value of `days`.
+        """
+        return (self.motion_float * days + self.radix_float) % 360
+
+    def batch(self, days: Iterable[float]) -> np.ndarray:
+        """
+        Mean positions, without units, for each value of `days`.
+
+        Evenly stepped whole days are evaluated with `series`.
+        """
+        days = np.asarray(days, dtype=float)
+
+        if len(days) > 2 and (step := days[1] - days[0]).is_integer():
+            start = days[0]
+            if (
+                start.is_integer()
+                and (days == start + step * np.arange(len(days))).all()
+            ):
+                return self.series(start, step, len(days))
+
+        return np.array([mod(self.motion * d + self.radix) for d in days], dtype=object)
+
+    def series(self, start: float, step: float, count: int) -> np.ndarray:
+        """
+        Mean positions, without units, of `count` dates `step` days apart.
+
+        The first position is computed like `batch` and the next ones by adding
+        the motion of a step. Both are exact, and give the same positions, as
+        long as `start` and `step` are whole numbers of days.
+        """
+        if not (float(start).is_integer() and float(step).is_integer()):
+            raise ValueError("Series must start and step on whole days")
+
+        positions = np.empty(count, dtype=object)
+        if not count:
+            return positions
+
+        increment = self.motion * step
+        positions[0] = mod(self.motion * start + self.radix)
+        for idx in range(1, count):
+            positions[idx] = mod(positions[idx - 1] + increment)
 
-    mm = (Sexagesimal(raw_input[0]), Sexagesimal(raw_input[1]))
+        return positions
 
-    def func(days: float) -> BasedQuantity:
-        return mod(mm[0] * days + mm[1]) * degree
 
-    return staticmethod(func)
+def make_mean_motion(raw_input: tuple[str, str]) -> MeanMotion:
+    return MeanMotion(raw_input)
@@ -0,0 +1,75 @@
+"""
+HTTP caching of the responses of the routes computing pure functions of their
+parameters.
+
+Responses get a strong ETag hashing their parameters with the version of the
+code, of kanon, of the table engine and of the table set they use, and requests
+whose If-None-Match holds it are answered with 304 without being computed.
+"""
+
+from fastapi import Request, Response
+
+from kanon_api import settings
+
+from .versions import digest, results_version
+
+CACHED_PREFIXES = ("/calendars/", "/calculations/", "/ephemerides/", "/models/")
+
+
+def is_cacheable(request: Request) -> bool:
+    return request.method in ("GET", "HEAD") and request.url.path.startswith(
+        CACHED_PREFIXES
+    )
+
+
+def etag(request: Request) -> str:
+    path = request.url.path
+    segments = path.split("/")
+    table_set = segments[2] if segments[1] == "ephemerides" else ""
+
+    # Repeated parameters keep their order, which may matter
+    query = sorted(request.query_params.multi_items(), key=lambda item: item[0])
+
+    return '"{}"'.format(
+        digest(
+            path.encode(), repr(query).encode(), results_version(table_set).encode()
+        )[:32]
+    )
+
+
+def matches(if_none_match: str, tag: str) -> bool:
+    """
+    Whether an If-None-Match header matches `tag`, with the weak comparison.
+    """
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == tag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def cache_headers(tag: str) -> dict[str, str]:
+    return {
+        "ETag": tag,
+        "Cache-Control": f"public, max-age={settings.HTTP_CACHE_MAX_AGE}",
+    }
+
+
+async def conditional_get(request: Request, call_next) -> Response:
+    if not is_cacheable(request):
+        return await call_next(request)
+
+    tag = etag(request)
+
+    if (if_none_match := request.headers.get("if-none-match")) and matches(
+        if_none_match, tag
+    ):
+        return Response(status_code=304, headers=cache_headers(tag))
+
+    response = await call_next(request)
+
+    if response.status_code == 200:
+        response.headers.update(cache_headers(tag))
+
+    return response
@@ -0,0 +1,234 @@
+"""
+Metrics of the requests and of the worker pool, rendered in the Prometheus
+text format.
+"""
+
+import math
+import threading
+import time
+from typing import Any, Callable, Iterable
+
+# Latency buckets, in seconds, of the Prometheus clients
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, math.inf)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterable[tuple[str, Labels, float]]:
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+            *(
+                f"{name}{format_labels(labels)} {format_value(value)}"
+                for name, labels, value in self.samples()
+            ),
+        ]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str):
+        super().__init__(name, documentation)
+        self.values: dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = tuple(labels.items())
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, labels, v) for labels, v in self.values.items()]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str):
+        with self._lock:
+            self.values[tuple(labels.items())] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, buckets: tuple[float, ...] = BUCKETS
+    ):
+        super().__init__(name, documentation)
+        self.buckets = buckets
+        self.counts: dict[Labels, list[int]] = {}
+        self.sums: dict[Labels, float] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(labels.items())
+        with self._lock:
+            counts = self.counts.setdefault(key, [0] * len(self.buckets))
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[idx] += 1
+            self.sums[key] = self.sums.get(key, 0) + value
+
+    def samples(self):
+        samples: list[tuple[str, Labels, float]] = []
+        with self._lock:
+            for labels, counts in self.counts.items():
+                for bound, count in zip(self.buckets, counts):
+                    le = (("le", format_value(bound)),)
+                    samples.append((f"{self.name}_bucket", labels + le, count))
+                samples.append((f"{self.name}_sum", labels, self.sums[labels]))
+                samples.append((f"{self.name}_count", labels, counts[-1]))
+        return samples
+
+
+class Collector(Metric):
+    """
+    Metric whose samples are read, when rendered, from `collect`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        type: str,
+        collect: Callable[[], Iterable[tuple[dict[str, str], float | None]]],
+    ):
+        super().__init__(name, documentation)
+        self.type = type
+        self.collect = collect
+
+    def samples(self):
+        return [
+            (self.name, tuple(labels.items()), value)
+            for labels, value in self.collect()
+            if value is not None
+        ]
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Any:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "".join(
+            line + "\n" for metric in self.metrics.values() for line in metric.render()
+        )
+
+
+registry = Registry()
+
+request_latency: Histogram = registry.register(
+    Histogram("kanon_request_duration_seconds", "Latency of the requests by route.")
+)
+requests_in_flight: Gauge = registry.register(
+    Gauge("kanon_requests_in_flight", "Requests being handled by route.")
+)
+
+executor_wait: Histogram = registry.register(
+    Histogram(
+        "kanon_executor_wait_seconds",
+        "Time from the submission of a task to the pool to its start in a worker.",
+    )
+)
+executor_ipc: Histogram = registry.register(
+    Histogram(
+        "kanon_executor_ipc_seconds",
+        "Time taken to pickle a task result and send it back from its worker.",
+    )
+)
+executor_compute: Histogram = registry.register(
+    Histogram("kanon_executor_compute_seconds", "Time spent computing a task.")
+)
+executor_tasks: Gauge = registry.register(
+    Gauge("kanon_executor_tasks_in_flight", "Tasks submitted to the worker pool.")
+)
+
+scheduler_queue: Gauge = registry.register(
+    Gauge("kanon_scheduler_queued_seconds", "Estimated time of the queued chunks.")
+)
+scheduler_rejections: Counter = registry.register(
+    Counter("kanon_scheduler_rejections_total", "Requests rejected by status code.")
+)
+
+single_flight_deduplicated: Counter = registry.register(
+    Counter(
+        "kanon_single_flight_deduplicated_total",
+        "Computations shared with an identical one already running.",
+    )
+)
+
+almanac_lookups: Counter = registry.register(
+    Counter("kanon_almanac_lookups_total", "True positions looked up in almanacs.")
+)
+
+
+def timed_call(
+    func: Callable, submitted: float, *args
+) -> tuple[Any, float, float, float]:
+    """
+    Calls `func(*args)` in a worker, with the time waited since `submitted`,
+    the computation time and the time of the end of the call.
+    """
+    started = time.time()
+    start = time.perf_counter()
+
+    result = func(*args)
+
+    return result, started - submitted, time.perf_counter() - start, time.time()
+
+
+async def run_timed(loop, executor, func: Callable, *args) -> tuple[Any, float]:
+    """
+    Result of `func(*args)` run in `executor`, and its computation time,
+    recording the time spent in each stage of the task.
+    """
+    task = getattr(func, "__name__", "task")
+
+    executor_tasks.inc(task=task)
+    try:
+        result, wait, compute, finished = await loop.run_in_executor(
+            executor, timed_call, func, time.time(), *args
+        )
+    finally:
+        executor_tasks.dec(task=task)
+
+    executor_wait.observe(max(0, wait), task=task)
+    executor_compute.observe(compute, task=task)
+    executor_ipc.observe(max(0, time.time() - finished), task=task)
+
+    return result, compute
@@ -0,0 +1,167 @@
+"""
+Bounded cache of computed results, in memory with an optional on disk tier.
+"""
+
+import pickle
+import sqlite3
+import threading
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Any, Hashable, Iterable
+
+from kanon_api import settings
+
+from .versions import results_version
+
+# Maximum number of SQL variables in a query on old SQLite versions
+SQLITE_MAX_VARIABLES = 999
+
+
+def disk_key(key: Hashable) -> str:
+    """
+    Key of a result on disk, with the version of the results of the table set
+    named by the second item of tuple keys, so that results computed by another
+    version of the code, another table engine or another version of the table
+    set are not read.
+    """
+    table_set = ""
+    if isinstance(key, tuple) and len(key) > 1 and isinstance(key[1], str):
+        table_set = key[1]
+
+    return repr((results_version(table_set), key))
+
+
+class DiskTier:
+    """
+    Pickled results in a SQLite database, shared by the processes of a node.
+
+    Its connection is used by a single thread at a time.
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB)"
+        )
+        self.connection.commit()
+
+    def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        found: dict[str, bytes] = {}
+        with self._lock:
+            for idx in range(0, len(keys), SQLITE_MAX_VARIABLES):
+                chunk = keys[idx : idx + SQLITE_MAX_VARIABLES]  # noqa: E203
+                found.update(
+                    self.connection.execute(
+                        "SELECT key, value FROM results WHERE key IN "
+                        f"({','.join('?' * len(chunk))})",
+                        chunk,
+                    )
+                )
+        return found
+
+    def set_many(self, items: Iterable[tuple[str, bytes]]):
+        rows = list(items)
+        with self._lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?)", rows
+            )
+
+
+class ResultCache:
+    """
+    LRU cache bounded by a number of entries and by the pickled size of the
+    entries, in front of an optional `DiskTier`.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        directory: Path | None = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk = DiskTier(directory / "results.sqlite") if directory else None
+
+        self.entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self.size = 0
+        self.stats: Counter[str] = Counter(hits=0, misses=0, evictions=0, disk_hits=0)
+        self._lock = threading.Lock()
+
+    def _insert(self, key: Hashable, value: Any, size: int):
+        if key in self.entries:
+            self.size -= self.entries.pop(key)[1]
+
+        self.entries[key] = (value, size)
+        self.size += size
+
+        while self.entries and (
+            len(self.entries) > self.max_entries or self.size > self.max_bytes
+        ):
+            self.size -= self.entries.popitem(last=False)[1][1]
+            self.stats["evictions"] += 1
+
+    def get_many(self, keys: Iterable[Hashable]) -> dict[Hashable, Any]:
+        """
+        Cached values of the `keys` found in memory or on disk.
+        """
+        found: dict[Hashable, Any] = {}
+        missing: list[Hashable] = []
+
+        with self._lock:
+            for key in keys:
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+                    found[key] = self.entries[key][0]
+                else:
+                    missing.append(key)
+
+        if self.disk and missing:
+            disk_keys = {key: disk_key(key) for key in missing}
+            stored = self.disk.get_many(list(disk_keys.values()))
+            with self._lock:
+                for key in missing:
+                    if (blob := stored.get(disk_keys[key])) is not None:
+                        found[key] = pickle.loads(blob)
+                        self._insert(key, found[key], len(blob))
+                        self.stats["disk_hits"] += 1
+
+        with self._lock:
+            self.stats["hits"] += len(found)
+            self.stats["misses"] += len(set(missing) - found.keys())
+
+        return found
+
+    def set_many(self, items: dict[Hashable, Any]):
+        blobs = {key: pickle.dumps(value) for key, value in items.items()}
+
+        with self._lock:
+            for key, value in items.items():
+                self._insert(key, value, len(blobs[key]))
+
+        if self.disk:
+            self.disk.set_many((disk_key(key), blob) for key, blob in blobs.items())
+
+    def get(self, key: Hashable) -> Any | None:
+        return self.get_many([key]).get(key)
+
+    def set(self, key: Hashable, value: Any):
+        self.set_many({key: value})
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.size = 0
+
+    def info(self) -> dict[str, int]:
+        return {**self.stats, "entries": len(self.entries), "bytes": self.size}
+
+
+result_cache = ResultCache(
+    settings.RESULT_CACHE_ENTRIES,
+    settings.RESULT_CACHE_BYTES,
+    settings.RESULT_CACHE_DIR,
+)
@@ -1,14 +1,32 @@
-import asyncio
-from concurrent.futures.process import ProcessPoolExecutor
+import os
 from functools import partial
-from typing import Type
+from itertools import chain
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Hashable,
+    Iterable,
+    Sequence,
+    Type,
+    TypeVar,
+)
 
-from fastapi.param_functions import Depends, Path, Query
+import numpy as np
+from fastapi.exceptions import HTTPException
+from fastapi.param_functions import Body, Depends, Path, Query
+from fastapi.responses import Response
 from fastapi.routing import APIRouter
 from kanon.calendars import Date
 from kanon.units import Sexagesimal
-
-from kanon_api.core.ephemerides.ascendant import ascendant
+from kanon.units.radices import BasedQuantity
+from pydantic import BaseModel, Field, confloat, validator
+from starlette.concurrency import run_in_threadpool
+
+from kanon_api.core.ephemerides.almanac import almanac
+from kanon_api.core.ephemerides.ascendant import ascendant, ascendant_grid
+from kanon_api.core.ephemerides.events import EventType, find_events
+from kanon_api.core.ephemerides.float_position import ascendant_float, float_pos_batch
 from kanon_api.core.ephemerides.houses import HouseMethods, safe_houses_method
 from kanon_api.core.ephemerides.table_classes import (
     CelestialBody,
@@ -19,15 +37,40 @@ from kanon_api.core.ephemerides.table_classes import (
     Saturn,
     Sun,
     SuperiorPlanet,
+    TableSet,
     Venus,
 )
-from kanon_api.core.ephemerides.tables import TableSets
+from kanon_api.core.ephemerides.tables import safe_table_set_name, table_sets
 from kanon_api.core.ephemerides.true_position import (
+    SharedTerms,
     moon_true_pos,
     planet_true_pos,
     sun_true_pos,
+    true_pos_batch,
+)
+from kanon_api.metrics import almanac_lookups
+from kanon_api.result_cache import result_cache
+from kanon_api.scheduler import MIN_CHUNK_SIZE, Scheduler, get_scheduler
+from kanon_api.single_flight import single_flight
+from kanon_api.streaming import (
+    FastJSONResponse,
+    OutputFormat,
+    check_format,
+    degrees,
+    npz_response,
+    ordered_results,
+    stream_rows,
 )
-from kanon_api.utils import JULIAN_CALENDAR, DateParams, Planet, get_executor, safe_date
+from kanon_api.utils import (
+    JULIAN_CALENDAR,
+    DateParams,
+    Planet,
+    Precision,
+    safe_date,
+    split_in_chunks,
+)
+
+T = TypeVar("T")
 
 router = APIRouter(prefix="/ephemerides/{table_set}", tags=["ephemerides"])
 
@@ -41,12 +84,14 @@ enum_to_class: dict[Planet, Type[CelestialBody]] = {
     Planet.VENUS: Venus,
 }
 
+class_to_enum = {body: planet for planet, body in enum_to_class.items()}
+
 
 def compute_true_pos(
     table_set_name: str, planet_class: Type[CelestialBody], days: float
 ):
 
-    planet = TableSets(table_set_name)(planet_class)
+    planet = table_sets[table_set_name](planet_class)
 
     if isinstance(planet, Sun):
         func = partial(sun_true_pos, table_set=planet.tset)
@@ -66,24 +111,218 @@ def compute_true_pos(
     return str(round(func(days=days).value, 2))
 
 
-def get_planet_with_set(table_set: TableSets = Path(...), planet: Planet = Path(...)):
-    return table_set.name, enum_to_class[planet]
+def compute_true_pos_batch(
+    table_set_name: str, planet_class: Type[CelestialBody], days: Sequence[float]
+) -> list[str]:
 
+    planet = table_sets[table_set_name](planet_class)
 
-async def run_compute_pos(
-    executor, table_set: str, planet: Type[CelestialBody], date: Date
+    return [str(round(pos, 2)) for pos in true_pos_batch(planet, days)]
+
+
+def get_table_set(table_set_name: str = Depends(safe_table_set_name)) -> TableSet:
+    return table_sets[table_set_name]
+
+
+def get_planet_with_set(
+    table_set_name: str = Depends(safe_table_set_name), planet: Planet = Path(...)
 ):
-    return (
-        date.jdn,
-        await asyncio.get_running_loop().run_in_executor(
-            executor,
-            compute_true_pos,
-            table_set,
-            planet,
-            date.days_from_epoch(),
-        ),
+    return table_set_name, enum_to_class[planet]
+
+
+def compute_all_true_pos_batch(
+    table_set_name: str, days: Sequence[float]
+) -> list[dict[str, str]]:
+
+    table_set = table_sets[table_set_name]
+    terms = SharedTerms(table_set, days)
+
+    positions = {
+        planet: true_pos_batch(table_set(body), days, terms)
+        for planet, body in enum_to_class.items()
+    }
+
+    return [
+        {planet.value: str(round(pos[idx], 2)) for planet, pos in positions.items()}
+        for idx in range(len(days))
+    ]
+
+
+def compute_float_pos_batch(
+    table_set_name: str, planet_class: Type[CelestialBody], days: Sequence[float]
+) -> list[float]:
+
+    planet = table_sets[table_set_name](planet_class)
+
+    return float_pos_batch(planet, days).tolist()
+
+
+def compute_all_float_pos_batch(
+    table_set_name: str, days: Sequence[float]
+) -> list[dict[str, float]]:
+
+    table_set = table_sets[table_set_name]
+
+    positions = {
+        planet: float_pos_batch(table_set(body), days).tolist()
+        for planet, body in enum_to_class.items()
+    }
+
+    return [
+        {planet.value: pos[idx] for planet, pos in positions.items()}
+        for idx in range(len(days))
+    ]
+
+
+PositionKey = tuple[str, str, str, float]
+
+
+def cached_positions(keys: Iterable[PositionKey]) -> dict[Hashable, str]:
+    """
+    Positions of the `("true_pos", table_set, body, days)` keys found in the
+    almanac of their table set, or else in the result cache.
+
+    It reads from disk, and is run in a thread by async routes.
+    """
+    found: dict[Hashable, str] = {}
+    missing: list[PositionKey] = []
+
+    for key in keys:
+        _, table_set, body, days = key
+        table = almanac(table_set)
+        if table is not None and (pos := table.get(body, days)) is not None:
+            found[key] = pos
+        else:
+            missing.append(key)
+
+    almanac_lookups.inc(len(found), result="hit")
+    almanac_lookups.inc(len(missing), result="miss")
+
+    found.update(result_cache.get_many(missing))
+
+    return found
+
+
+async def run_compute_pos(
+    scheduler: Scheduler,
+    table_set: str,
+    planet: Type[CelestialBody],
+    dates: list[Date],
+    admit: bool = True,
+) -> list[str]:
+
+    keys = [
+        ("true_pos", table_set, planet.__name__, date.days_from_epoch())
+        for date in dates
+    ]
+
+    positions = await run_in_threadpool(cached_positions, keys)
+
+    missing = list(dict.fromkeys(key for key in keys if key not in positions))
+    days = [key[-1] for key in missing]
+
+    if days:
+        results = await scheduler.run(
+            compute_true_pos_batch, days, table_set, planet, admit=admit
+        )
+
+        computed: dict[Hashable, str] = dict(zip(missing, results))
+        await run_in_threadpool(result_cache.set_many, computed)
+        positions.update(computed)
+
+    return [positions[key] for key in keys]
+
+
+async def run_compute_all_pos(
+    scheduler: Scheduler, table_set: str, dates: list[Date], admit: bool = True
+) -> list[dict[str, str]]:
+
+    keys = {
+        planet.value: [
+            ("true_pos", table_set, body.__name__, date.days_from_epoch())
+            for date in dates
+        ]
+        for planet, body in enum_to_class.items()
+    }
+
+    positions = await run_in_threadpool(
+        cached_positions, list(chain.from_iterable(keys.values()))
+    )
+
+    missing = list(
+        dict.fromkeys(
+            key[-1]
+            for body_keys in keys.values()
+            for key in body_keys
+            if key not in positions
+        )
     )
 
+    if missing:
+        results = await scheduler.run(
+            compute_all_true_pos_batch, missing, table_set, admit=admit
+        )
+
+        computed: dict[Hashable, str] = {
+            ("true_pos", table_set, body.__name__, days): result[planet.value]
+            for days, result in zip(missing, results)
+            for planet, body in enum_to_class.items()
+        }
+        await run_in_threadpool(result_cache.set_many, computed)
+        positions.update(computed)
+
+    return [
+        {planet: positions[body_keys[idx]] for planet, body_keys in keys.items()}
+        for idx in range(len(dates))
+    ]
+
+
+async def stream_series(
+    start_date: Date,
+    offsets: range,
+    compute: Callable[[list[Date]], Awaitable[list[T]]],
+) -> AsyncIterator[tuple[Date, T]]:
+    """
+    Yields the dates `offsets` days after `start_date` in order, with their
+    results, computing a bounded number of chunks of dates at once.
+    """
+
+    async def compute_chunk(chunk: Sequence[int]) -> tuple[list[Date], list[T]]:
+        dates = [start_date + i for i in chunk]
+        return dates, await compute(dates)
+
+    async for _, (dates, results) in ordered_results(
+        split_in_chunks(offsets, MIN_CHUNK_SIZE),
+        compute_chunk,
+        2 * (os.cpu_count() or 1),
+    ):
+        for item in zip(dates, results):
+            yield item
+
+
+# Series not streamed are built in memory, streams being only bounded by the
+# estimated cost of their computation
+MAX_SERIES_SIZE = 100_000
+
+
+def admit_series(
+    scheduler: Scheduler, task: Callable, number_of_values: int, output: OutputFormat
+):
+    """
+    Admits a series of `number_of_values` items of `task` before building any of
+    its dates, its jobs being then queued with `admit` false.
+    """
+    if (
+        output not in (OutputFormat.NDJSON, OutputFormat.CSV)
+        and number_of_values > MAX_SERIES_SIZE
+    ):
+        raise HTTPException(
+            400,
+            f"Series of more than {MAX_SERIES_SIZE} values must be streamed",
+        )
+
+    scheduler.admit(task, number_of_values)
+
 
 @router.get("/{planet}/true_pos/")
 async def get_true_pos(
@@ -91,46 +330,457 @@ async def get_true_pos(
     date_params: DateParams = Depends(),
     number_of_values: int = Query(1, ge=1),
     step: int = Query(1, ge=1),
-    executor: ProcessPoolExecutor = Depends(get_executor),
+    scheduler: Scheduler = Depends(get_scheduler),
+    output: OutputFormat = Query(OutputFormat.JSON, alias="format"),
+    precision: Precision = Query(Precision.EXACT),
 ):
 
     start_date = safe_date(JULIAN_CALENDAR, date_params)
 
-    dates = (start_date + i for i in range(0, number_of_values * step, step))
+    offsets = range(0, number_of_values * step, step)
+
+    float_precision = precision == Precision.FLOAT
+
+    admit_series(
+        scheduler,
+        compute_float_pos_batch if float_precision else compute_true_pos_batch,
+        number_of_values,
+        output,
+    )
+
+    async def compute(dates: list[Date]) -> list:
+        if float_precision:
+            return await scheduler.run(
+                compute_float_pos_batch,
+                [date.days_from_epoch() for date in dates],
+                *planet_with_set,
+                admit=False,
+            )
+        return await run_compute_pos(scheduler, *planet_with_set, dates, False)
+
+    if output in (OutputFormat.NDJSON, OutputFormat.CSV):
+        # Streams compute their chunks as they are sent
+        return stream_rows(
+            (
+                {"jdn": date.jdn, "position": position}
+                async for date, position in stream_series(start_date, offsets, compute)
+            ),
+            output,
+        )
+
+    dates = [start_date + i for i in offsets]
+
+    table_set_name, planet = planet_with_set
+    key = (
+        "true_pos",
+        table_set_name,
+        planet.__name__,
+        start_date.days_from_epoch(),
+        number_of_values,
+        step,
+        precision.value,
+    )
+    positions = await single_flight.run(key, lambda: compute(dates))
+
+    if output == OutputFormat.NPZ:
+        to_degrees = degrees if precision == Precision.EXACT else float
+        return npz_response(
+            {
+                "jdn": [date.jdn for date in dates],
+                "position": [to_degrees(position) for position in positions],
+            }
+        )
+
+    return FastJSONResponse(
+        [
+            {"jdn": date.jdn, "position": position}
+            for date, position in zip(dates, positions)
+        ]
+    )
+
+
+@router.get("/true_pos/")
+async def get_all_true_pos(
+    table_set_name: str = Depends(safe_table_set_name),
+    date_params: DateParams = Depends(),
+    number_of_values: int = Query(1, ge=1),
+    step: int = Query(1, ge=1),
+    scheduler: Scheduler = Depends(get_scheduler),
+    output: OutputFormat = Query(OutputFormat.JSON, alias="format"),
+    precision: Precision = Query(Precision.EXACT),
+):
+
+    start_date = safe_date(JULIAN_CALENDAR, date_params)
+
+    offsets = range(0, number_of_values * step, step)
+
+    float_precision = precision == Precision.FLOAT
+
+    admit_series(
+        scheduler,
+        compute_all_float_pos_batch if float_precision else compute_all_true_pos_batch,
+        number_of_values,
+        output,
+    )
+
+    async def compute(dates: list[Date]) -> list[dict]:
+        if float_precision:
+            return await scheduler.run(
+                compute_all_float_pos_batch,
+                [date.days_from_epoch() for date in dates],
+                table_set_name,
+                admit=False,
+            )
+        return await run_compute_all_pos(scheduler, table_set_name, dates, False)
+
+    if output in (OutputFormat.NDJSON, OutputFormat.CSV):
+        return stream_rows(
+            (
+                {"jdn": date.jdn, "positions": position}
+                async for date, position in stream_series(start_date, offsets, compute)
+            ),
+            output,
+        )
+
+    dates = [start_date + i for i in offsets]
+
+    key = (
+        "all_true_pos",
+        table_set_name,
+        start_date.days_from_epoch(),
+        number_of_values,
+        step,
+        precision.value,
+    )
+    positions = await single_flight.run(key, lambda: compute(dates))
+
+    if output == OutputFormat.NPZ:
+        to_degrees = degrees if precision == Precision.EXACT else float
+        return npz_response(
+            {
+                "jdn": [date.jdn for date in dates],
+                **{
+                    planet.value: [
+                        to_degrees(position[planet]) for position in positions
+                    ]
+                    for planet in enum_to_class
+                },
+            }
+        )
+
+    return FastJSONResponse(
+        [
+            {"jdn": date.jdn, "positions": position}
+            for date, position in zip(dates, positions)
+        ]
+    )
+
+
+# Events are searched over at most a century
+MAX_EVENT_DAYS = 36_525
+
+# Moon positions are computed daily to bracket its events
+EVENT_STEP = 1
+
+
+def compute_events(
+    table_set_name: str,
+    event_types: list[EventType],
+    planets: list[Planet],
+    days: Sequence[float],
+) -> list[dict]:
 
-    results = await asyncio.gather(
-        *(run_compute_pos(executor, *planet_with_set, date) for date in dates)
+    events = find_events(
+        table_sets[table_set_name],
+        days[0],
+        days[-1] + EVENT_STEP,
+        EVENT_STEP,
+        event_types,
+        [enum_to_class[planet] for planet in planets],
     )
 
-    return [{"jdn": jdn, "position": position} for jdn, position in results]
+    return [
+        {
+            "type": event.type,
+            "name": event.name,
+            "bodies": [class_to_enum[body] for body in event.bodies],
+            "jdn": event.days + JULIAN_CALENDAR.era.epoch,
+            "longitude": str(round(event.longitude, 2)),
+        }
+        for event in events
+    ]
+
+
+@router.get("/events/")
+async def get_events(
+    table_set_name: str = Depends(safe_table_set_name),
+    date_params: DateParams = Depends(),
+    number_of_days: int = Query(..., ge=1, le=MAX_EVENT_DAYS),
+    events: list[EventType] = Query(list(EventType)),
+    bodies: list[Planet] = Query(list(Planet)),
+    scheduler: Scheduler = Depends(get_scheduler),
+):
+
+    start = safe_date(JULIAN_CALENDAR, date_params).days_from_epoch()
+
+    return await scheduler.run(
+        compute_events,
+        [start + i * EVENT_STEP for i in range(number_of_days // EVENT_STEP)],
+        table_set_name,
+        events,
+        bodies,
+    )
+
+
+def cached_ascendant(
+    table_set: TableSet, days: float, latitude: float
+) -> BasedQuantity:
+    key = ("ascendant", table_set.name, days, latitude)
+
+    if (asc := result_cache.get(key)) is None:
+        asc = ascendant(table_set, days, latitude)
+        result_cache.set(key, asc)
+
+    return asc
 
 
 @router.get("/ascendant/")
 def get_ascendant(
-    table_set: TableSets = Path(...),
+    table_set: TableSet = Depends(get_table_set),
     latitude: float = Query(..., ge=-90, le=90),
     date_params: DateParams = Depends(),
+    precision: Precision = Query(Precision.EXACT),
 ):
 
     date = safe_date(JULIAN_CALENDAR, date_params)
+    days = date.days_from_epoch()
+
+    if precision == Precision.FLOAT:
+        return {"value": float(ascendant_float(table_set, [days], latitude)[0])}
 
-    pos = ascendant(table_set, date.days_from_epoch(), latitude)
+    def compute() -> str:
+        pos = cached_ascendant(table_set, days, latitude)
+        return str(round(Sexagesimal(pos.value, 2)))
 
-    return {"value": str(round(Sexagesimal(pos.value, 2)))}
+    key = ("ascendant", table_set.name, days, latitude)
+
+    return {"value": single_flight.call(key, compute)}
 
 
 @router.get("/houses/")
 def get_houses(
-    table_set: TableSets = Path(...),
+    table_set: TableSet = Depends(get_table_set),
     method: HouseMethods = Depends(safe_houses_method),
     latitude: float = Query(..., ge=-90, le=90),
     date_params: DateParams = Depends(),
 ):
 
     date = safe_date(JULIAN_CALENDAR, date_params)
+    days = date.days_from_epoch()
+
+    def compute() -> list[str]:
+        asc = cached_ascendant(table_set, days, latitude)
+        houses_list = method(table_set, asc, latitude)
+        return [str(round(Sexagesimal(x, 2))) for x in houses_list]
+
+    key = ("houses", table_set.name, method.name, days, latitude)
+
+    return single_flight.call(key, compute)
+
+
+@router.get("/houses/compare/")
+def get_houses_compare(
+    table_set: TableSet = Depends(get_table_set),
+    latitude: float = Query(..., ge=-90, le=90),
+    date_params: DateParams = Depends(),
+):
+
+    date = safe_date(JULIAN_CALENDAR, date_params)
+
+    asc = cached_ascendant(table_set, date.days_from_epoch(), latitude)
+
+    return {
+        name: [str(round(Sexagesimal(x, 2))) for x in houses]
+        for name, houses in HouseMethods.compare(table_set, asc, latitude).items()
+    }
+
+
+MAX_GRID_SIZE = 100_000
+
+# Smallest step of latitude ranges, in degrees, about a third of a second of arc
+MIN_LATITUDE_STEP = 1e-4
+
+Latitude = confloat(ge=-90, le=90)
+
+
+class Instant(BaseModel):
+    year: int
+    month: int = Field(..., ge=1)
+    day: int = Field(..., ge=1)
+    hours: int = Field(12, ge=0, lt=24)
+    minutes: int = Field(0, ge=0, lt=60)
+
+
+class InstantRange(BaseModel):
+    start: Instant
+    number_of_values: int = Field(1, ge=1)
+    step_minutes: int = Field(60, ge=1)
+
+
+class LatitudeRange(BaseModel):
+    start: float = Field(..., ge=-90, le=90)
+    stop: float = Field(..., ge=-90, le=90)
+    step: float = Field(1, ge=MIN_LATITUDE_STEP)
+
+    @validator("stop")
+    def check_stop(cls, v, values):
+        if "start" in values and v < values["start"]:
+            raise ValueError("stop must not be lower than start")
+        return v
+
+    @property
+    def count(self) -> int:
+        return int((self.stop - self.start) / self.step + 1e-9) + 1
 
-    asc = ascendant(table_set, date.days_from_epoch(), latitude)
 
-    houses_list = method(table_set, asc, latitude)
+class GridRequest(BaseModel):
+    instants: list[Instant] | InstantRange
+    latitudes: list[Latitude] | LatitudeRange  # type: ignore
+
+    @property
+    def dates(self) -> list[Date]:
+        if isinstance(self.instants, InstantRange):
+            start = safe_date(JULIAN_CALENDAR, DateParams(**self.instants.start.dict()))
+            step = self.instants.step_minutes / (24 * 60)
+            return [start + i * step for i in range(self.instants.number_of_values)]
+
+        return [
+            safe_date(JULIAN_CALENDAR, DateParams(**instant.dict()))
+            for instant in self.instants
+        ]
+
+    @property
+    def latitude_values(self) -> list[float]:
+        if isinstance(self.latitudes, LatitudeRange):
+            start, step = self.latitudes.start, self.latitudes.step
+            return [start + i * step for i in range(self.latitudes.count)]
+
+        return list(self.latitudes)
+
+    @property
+    def size(self) -> int:
+        """
+        Number of values of the grid, computed without building its instants
+        and latitudes.
+        """
+        instants, latitudes = self.instants, self.latitudes
+        instant_count = (
+            instants.number_of_values
+            if isinstance(instants, InstantRange)
+            else len(instants)
+        )
+        latitude_count = (
+            latitudes.count if isinstance(latitudes, LatitudeRange) else len(latitudes)
+        )
+        return instant_count * latitude_count
+
+
+def check_grid(grid: GridRequest) -> GridRequest:
+    if not grid.size:
+        raise HTTPException(400, "The grid is empty")
+    if grid.size > MAX_GRID_SIZE:
+        raise HTTPException(
+            400, f"The grid can't have more than {MAX_GRID_SIZE} values"
+        )
+    return grid
+
+
+def compute_ascendant_grid(
+    table_set_name: str, latitudes: list[float], days: Sequence[float]
+) -> list[list[str]]:
+
+    grid = ascendant_grid(table_sets[table_set_name], days, latitudes)
+
+    return [[str(round(Sexagesimal(asc, 2))) for asc in row] for row in grid]
+
+
+def compute_houses_grid(
+    table_set_name: str,
+    method_name: str,
+    latitudes: list[float],
+    days: Sequence[float],
+) -> list[list[list[str]]]:
+
+    table_set = table_sets[table_set_name]
+
+    grid = HouseMethods[method_name].grid(
+        table_set, ascendant_grid(table_set, days, latitudes), latitudes
+    )
+
+    return [
+        [[str(round(Sexagesimal(x, 2))) for x in houses] for houses in row]
+        for row in grid
+    ]
+
+
+def grid_response(
+    latitudes: list[float], dates: list[Date], values: list, output: OutputFormat
+) -> Response:
+    columns = {"latitudes": latitudes, "jdn": [date.jdn for date in dates]}
+
+    if output == OutputFormat.NPZ:
+        return npz_response(
+            {**columns, "values": np.vectorize(degrees, otypes=[float])(values)}
+        )
+
+    return FastJSONResponse({**columns, "values": values})
+
+
+@router.post("/ascendant/grid/")
+async def post_ascendant_grid(
+    table_set_name: str = Depends(safe_table_set_name),
+    grid: GridRequest = Body(...),
+    scheduler: Scheduler = Depends(get_scheduler),
+    output: OutputFormat = Query(OutputFormat.JSON, alias="format"),
+):
+
+    check_grid(grid)
+    check_format(output, OutputFormat.JSON, OutputFormat.NPZ)
+
+    dates = grid.dates
+    latitudes = grid.latitude_values
+
+    values = await scheduler.run(
+        compute_ascendant_grid,
+        [date.days_from_epoch() for date in dates],
+        table_set_name,
+        latitudes,
+    )
+
+    return grid_response(latitudes, dates, values, output)
+
+
+@router.post("/houses/grid/")
+async def post_houses_grid(
+    table_set_name: str = Depends(safe_table_set_name),
+    method: HouseMethods = Depends(safe_houses_method),
+    grid: GridRequest = Body(...),
+    scheduler: Scheduler = Depends(get_scheduler),
+    output: OutputFormat = Query(OutputFormat.JSON, alias="format"),
+):
+
+    check_grid(grid)
+    check_format(output, OutputFormat.JSON, OutputFormat.NPZ)
+
+    dates = grid.dates
+    latitudes = grid.latitude_values
+
+    values = await scheduler.run(
+        compute_houses_grid,
+        [date.days_from_epoch() for date in dates],
+        table_set_name,
+        method.name,
+        latitudes,
+    )
 
-    return [str(round(Sexagesimal(x, 2))) for x in houses_list]
+    return grid_response(latitudes, dates, values, output)
@@ -4,13 +4,20 @@ from typing import Any, Literal, Protocol, runtime_checkable
 
 import numpy as np
 from fastapi import HTTPException
-from fastapi.param_functions import Depends, Path
+from fastapi.param_functions import Depends, Path, Query
 from fastapi.routing import APIRouter
 from kanon.models.meta import ModelCallable as _ModelCallable
 from kanon.models.meta import get_model_by_id
 from pydantic import BaseModel, root_validator, validator
 from scipy import optimize
 
+from kanon_api.streaming import (
+    FastJSONResponse,
+    OutputFormat,
+    check_format,
+    npz_response,
+)
+
 router = APIRouter(prefix="/models", tags=["models"])
 
 
@@ -107,13 +114,26 @@ class TableContent(BaseModel):
 
 
 @router.post("/{model}/fill/", response_model=list[float])
-def fill_by_model(content: TableContent = Depends()):
+def fill_by_model(
+    content: TableContent = Depends(),
+    output: OutputFormat = Query(OutputFormat.JSON, alias="format"),
+):
+    check_format(output, OutputFormat.JSON, OutputFormat.NPZ)
+
     params = content.ordered_params.values()
     if None in params:
         raise HTTPException(400, detail="Null parameter")
     if content.arg2:
-        return [content(a1, a2, *params) for a2 in content.arg2 for a1 in content.arg1]
-    return [content(a1, *params) for a1 in content.arg1]
+        values = [
+            content(a1, a2, *params) for a2 in content.arg2 for a1 in content.arg1
+        ]
+    else:
+        values = [content(a1, *params) for a1 in content.arg1]
+
+    if output == OutputFormat.NPZ:
+        return npz_response({"values": values})
+
+    return FastJSONResponse(values)
 
 
 @router.post("/{model}/estimate/", response_model=dict[int, float])
@@ -0,0 +1,255 @@
+"""
+Scheduling of the computations of the requests on the worker pool.
+"""
+
+import asyncio
+import math
+from collections import deque
+from concurrent.futures import Executor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from typing import Any, Callable, Sequence, TypeVar
+
+from fastapi import HTTPException, Request
+
+from kanon_api import settings
+
+from .metrics import run_timed, scheduler_queue, scheduler_rejections
+from .utils import split_in_chunks
+
+T = TypeVar("T")
+
+MIN_CHUNK_SIZE = 16
+
+MAX_CHUNK_SIZE = 4096
+
+# Cost, in seconds, of an item of a task never timed yet
+DEFAULT_ITEM_COST = 0.005
+
+# Weight of the last chunk in the estimated cost of the items of a task
+COST_SMOOTHING = 0.2
+
+
+class Job:
+    """
+    Chunks of items of a call to `Scheduler.run`, with their results.
+    """
+
+    def __init__(
+        self, func: Callable, args: tuple, chunks: list[Sequence], item_cost: float
+    ):
+        self.func = func
+        self.args = args
+        self.task: str = func.__name__
+        self.item_cost = item_cost
+
+        self.pending = deque(enumerate(chunks))
+        self.results: list[Any] = [None] * len(chunks)
+        self.remaining = len(chunks)
+        self.done: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class Scheduler:
+    """
+    Runs the chunks of the jobs submitted by concurrent requests on a pool of
+    `max_workers` workers, taking turns between the jobs so that large ones do
+    not delay the others.
+
+    Chunks are sized to take about `chunk_seconds` given the cost per item
+    measured for their task. Jobs estimated to take more than `max_job_seconds`
+    are rejected, as are jobs whose chunks would be interleaved with more than
+    `max_queue_seconds` of queued chunks.
+    """
+
+    def __init__(
+        self,
+        executor: Executor,
+        max_workers: int,
+        max_queue_seconds: float = settings.SCHEDULER_MAX_QUEUE_SECONDS,
+        chunk_seconds: float = settings.SCHEDULER_CHUNK_SECONDS,
+        max_job_seconds: float = settings.SCHEDULER_MAX_JOB_SECONDS,
+    ):
+        self.executor = executor
+        self.max_workers = max_workers
+        self.max_queue_seconds = max_queue_seconds
+        self.chunk_seconds = chunk_seconds
+        self.max_job_seconds = max_job_seconds
+
+        self.costs: dict[str, float] = {}
+        self.jobs: deque[Job] = deque()
+        self.queued = 0.0
+        self.running = 0
+        self._tasks: set[asyncio.Task] = set()
+
+    def item_cost(self, task: str) -> float:
+        return self.costs.get(task, DEFAULT_ITEM_COST)
+
+    def chunk_size(self, task: str, size: int) -> int:
+        """
+        Number of items in the chunks of a job of `size` items, spreading small
+        jobs over the workers.
+        """
+        if task not in self.costs:
+            return max(MIN_CHUNK_SIZE, -(-size // self.max_workers))
+
+        target = int(self.chunk_seconds / max(self.costs[task], 1e-9))
+        spread = -(-size // self.max_workers)
+
+        return max(MIN_CHUNK_SIZE, min(target, spread, MAX_CHUNK_SIZE))
+
+    def retry_after(self, queued: float | None = None) -> int:
+        if queued is None:
+            queued = self.queued
+        return max(1, math.ceil(queued / self.max_workers))
+
+    def ahead(self, chunks: int) -> float:
+        """
+        Estimated time of the queued chunks run before the last chunk of a new
+        job of `chunks` chunks, the dispatch taking one chunk of each job in
+        turn.
+        """
+        return sum(
+            job.item_cost * sum(len(chunk) for _, chunk in islice(job.pending, chunks))
+            for job in self.jobs
+        )
+
+    def check(self, cost: float = 0, chunks: int = 1):
+        """
+        Raises an HTTP error if a job of estimated `cost` seconds, in `chunks`
+        chunks, is too large or would wait for too many queued chunks.
+        """
+        if cost > self.max_job_seconds:
+            scheduler_rejections.inc(status="400")
+            raise HTTPException(
+                400,
+                "The computation is too large, "
+                f"about {math.ceil(cost / self.max_workers)} seconds",
+            )
+
+        if (ahead := self.ahead(chunks)) > self.max_queue_seconds:
+            scheduler_rejections.inc(status="429")
+            raise HTTPException(
+                429,
+                "Too many computations are queued",
+                headers={"Retry-After": str(self.retry_after(ahead))},
+            )
+
+    def admit(self, func: Callable, size: int):
+        """
+        Checks that a job of `size` items of `func` can be queued, for requests
+        computing their items in later jobs run with `admit` false.
+        """
+        task = func.__name__
+        self.check(self.item_cost(task) * size, -(-size // self.chunk_size(task, size)))
+
+    async def run(
+        self,
+        func: Callable[..., list[T]],
+        items: Sequence,
+        *args,
+        admit: bool = True,
+    ) -> list[T]:
+        """
+        Concatenated results of `func(*args, chunk)` over chunks of `items`.
+
+        Jobs with `admit` false are queued even over the maximum, for the
+        following jobs of an admitted request.
+        """
+        if not items:
+            return []
+
+        task = func.__name__
+        chunks = list(split_in_chunks(items, self.chunk_size(task, len(items))))
+
+        job = Job(func, args, chunks, self.item_cost(task))
+
+        if admit:
+            self.check(job.item_cost * len(items), len(chunks))
+
+        self.jobs.append(job)
+        self._enqueue(job.item_cost * len(items))
+        self._dispatch()
+
+        try:
+            await job.done
+        finally:
+            if job.pending:
+                self._remove(job)
+
+        return [result for chunk in job.results for result in chunk]
+
+    def _enqueue(self, cost: float):
+        # Resetting the queue once empty avoids accumulating rounding errors
+        self.queued = max(0.0, self.queued + cost) if self.jobs else 0.0
+        scheduler_queue.set(self.queued)
+
+    def _remove(self, job: Job):
+        if job in self.jobs:
+            self.jobs.remove(job)
+        self._enqueue(-sum(job.item_cost * len(chunk) for _, chunk in job.pending))
+        job.pending.clear()
+
+    def _dispatch(self):
+        """
+        Sends chunks to the pool while workers are idle, taking one chunk of
+        each job in turn.
+        """
+        while self.jobs and self.running < self.max_workers:
+            job = self.jobs.popleft()
+            idx, chunk = job.pending.popleft()
+
+            if job.pending:
+                self.jobs.append(job)
+
+            self.running += 1
+            self._enqueue(-job.item_cost * len(chunk))
+            task = asyncio.ensure_future(self._run_chunk(job, idx, chunk))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_chunk(self, job: Job, idx: int, chunk: Sequence):
+        try:
+            result, compute = await run_timed(
+                asyncio.get_running_loop(),
+                self.executor,
+                job.func,
+                *job.args,
+                chunk,
+            )
+        except Exception as err:
+            if not job.done.done():
+                if isinstance(err, BrokenProcessPool):
+                    scheduler_rejections.inc(status="503")
+                    err = HTTPException(
+                        503,
+                        "The worker pool is unavailable",
+                        headers={"Retry-After": str(self.retry_after())},
+                    )
+                job.done.set_exception(err)
+            self._remove(job)
+        else:
+            self._update_cost(job.task, compute / len(chunk))
+            job.results[idx] = result
+            job.remaining -= 1
+            if not job.remaining and not job.done.done():
+                job.done.set_result(None)
+        finally:
+            self.running -= 1
+            self._dispatch()
+
+    def _update_cost(self, task: str, cost: float):
+        if task in self.costs:
+            cost = COST_SMOOTHING * cost + (1 - COST_SMOOTHING) * self.costs[task]
+        self.costs[task] = cost
+
+    def info(self) -> dict[str, Any]:
+        return {
+            "queued_seconds": self.queued,
+            "running": self.running,
+            "jobs": len(self.jobs),
+            "item_costs": dict(self.costs),
+        }
+
+
+def get_scheduler(request: Request) -> Scheduler:
+    return request.app.state.scheduler
@@ -1,3 +1,48 @@
 import os
+from pathlib import Path
 
 PRODUCTION = os.environ.get("PRODUCTION", False)
+
+# Table lookup engine: "exact" (HTable interpolation), "fast" (compiled float64
+# tables) or "verify" (exact results, checked against the fast ones)
+TABLE_ENGINE = os.environ.get("TABLE_ENGINE", "exact")
+
+# Memory budget, in bytes, of the table sets loaded by each process, beyond
+# which the least recently used ones are evicted
+TABLE_SET_MEMORY = int(os.environ.get("TABLE_SET_MEMORY", 512 * 2**20))
+
+# Comma separated table sets loaded by the workers when they start
+PRELOADED_TABLE_SETS = os.environ.get(
+    "PRELOADED_TABLE_SETS", "parisian_alphonsine_tables"
+).split(",")
+
+# Directory of the binary table packs read instead of DISHAS
+TABLE_PACK_DIR = Path(os.environ.get("TABLE_PACK_DIR", "table_packs"))
+
+# Directory of the almanacs of precomputed daily true positions
+ALMANAC_DIR = Path(os.environ.get("ALMANAC_DIR", "almanacs"))
+
+# Directory of the cached DISHAS table contents
+DISHAS_CACHE_DIR = Path(os.environ.get("DISHAS_CACHE_DIR", "dishas_cache"))
+
+# Only read tables already in the DISHAS cache, never fetching missing ones
+DISHAS_OFFLINE = bool(os.environ.get("DISHAS_OFFLINE", False))
+
+# Limits of the in memory cache of computed results, and directory of its
+# optional on disk tier shared by the processes of a node
+RESULT_CACHE_ENTRIES = int(os.environ.get("RESULT_CACHE_ENTRIES", 100_000))
+RESULT_CACHE_BYTES = int(os.environ.get("RESULT_CACHE_BYTES", 64 * 2**20))
+RESULT_CACHE_DIR = (
+    Path(os.environ["RESULT_CACHE_DIR"]) if "RESULT_CACHE_DIR" in os.environ else None
+)
+
+# Estimated seconds of computations queued for the worker pool beyond which
+# requests are rejected, and target duration of the chunks sent to the workers
+SCHEDULER_MAX_QUEUE_SECONDS = float(os.environ.get("SCHEDULER_MAX_QUEUE_SECONDS", 60))
+SCHEDULER_MAX_JOB_SECONDS = float(os.environ.get("SCHEDULER_MAX_JOB_SECONDS", 600))
+SCHEDULER_CHUNK_SECONDS = float(os.environ.get("SCHEDULER_CHUNK_SECONDS", 0.05))
+
+# Version of the code in the ETags of the responses, defaulting to a hash of
+# its sources, and lifetime in seconds of the responses in HTTP caches
+CODE_VERSION = os.environ.get("CODE_VERSION", "")
+HTTP_CACHE_MAX_AGE = int(os.environ.get("HTTP_CACHE_MAX_AGE", 7 * 24 * 60 * 60))
@@ -0,0 +1,92 @@
+"""
+Coalescing of identical computations running at the same time.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+from .metrics import single_flight_deduplicated
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Calls sharing the result of the computation already running for their key,
+    if any, instead of computing it again.
+
+    Keys are tuples whose first item names the kind of computation.
+    """
+
+    def __init__(self):
+        self.calls: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key: tuple) -> tuple[Future, bool]:
+        """
+        Future of the computation of `key`, created if none is running, and
+        whether it was.
+        """
+        with self._lock:
+            if (future := self.calls.get(key)) is not None:
+                single_flight_deduplicated.inc(kind=str(key[0]))
+                return future, True
+
+            future = self.calls[key] = Future()
+            return future, False
+
+    def _settle(self, key: tuple, future: Future, result=None, error=None):
+        with self._lock:
+            del self.calls[key]
+
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+    def call(self, key: tuple, func: Callable[[], T]) -> T:
+        """
+        Result of `func()`, or of the call running for `key` in another thread.
+        """
+        future, running = self._join(key)
+        if running:
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as err:
+            self._settle(key, future, error=err)
+            raise
+
+        self._settle(key, future, result)
+        return result
+
+    async def run(self, key: tuple, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Result of `await func()`, or of the coroutine running for `key`.
+
+        The computation is shielded from the cancellation of the request that
+        started it, as others may wait for it.
+        """
+        future, running = self._join(key)
+        if running:
+            return await asyncio.wrap_future(future)
+
+        task = asyncio.ensure_future(func())
+
+        def settle(task: asyncio.Task):
+            if task.cancelled():
+                self._settle(key, future, error=asyncio.CancelledError())
+            elif (error := task.exception()) is not None:
+                self._settle(key, future, error=error)
+            else:
+                self._settle(key, future, task.result())
+
+        task.add_done_callback(settle)
+
+        return await asyncio.shield(task)
+
+
+single_flight = SingleFlight()
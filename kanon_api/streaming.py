@@ -0,0 +1,153 @@
+import asyncio
+import csv
+import io
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, TypeVar
+
+import numpy as np
+import orjson
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from .utils import StrEnum
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content)
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class OutputFormat(StrEnum):
+    JSON = "json"
+    NDJSON = "ndjson"
+    CSV = "csv"
+    NPZ = "npz"
+
+
+MEDIA_TYPES = {
+    OutputFormat.NDJSON: "application/x-ndjson",
+    OutputFormat.CSV: "text/csv",
+    OutputFormat.NPZ: "application/x-npz",
+}
+
+
+def check_format(output: OutputFormat, *supported: OutputFormat) -> OutputFormat:
+    if output not in supported:
+        raise HTTPException(400, f"Unsupported format {output}")
+    return output
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded with orjson.
+
+    Returned by routes with large results, which then skip the conversion of
+    their content by FastAPI.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def npz_response(columns: dict[str, Any]) -> Response:
+    """
+    Columns as the float64 arrays of a NumPy `.npz` file, read with
+    `numpy.load`.
+    """
+    buffer = io.BytesIO()
+    np.savez(
+        buffer, **{name: np.asarray(c, dtype=np.float64) for name, c in columns.items()}
+    )
+    return Response(buffer.getvalue(), media_type=MEDIA_TYPES[OutputFormat.NPZ])
+
+
+def degrees(position: str) -> float:
+    """
+    Value of a sexagesimal string such as `"01,47 ; 18,48"`, correctly rounded.
+    """
+    position = position.replace(" ", "")
+    sign = -1 if position.startswith("-") else 1
+
+    left, _, right = position.lstrip("+-").partition(";")
+    fractional = right.split(",") if right else []
+
+    value = 0
+    for digit in left.split(",") + fractional:
+        value = value * 60 + int(digit)
+
+    return sign * value / 60 ** len(fractional)
+
+
+async def ordered_results(
+    chunks: Iterable[T],
+    compute: Callable[[T], Awaitable[R]],
+    max_in_flight: int,
+) -> AsyncIterator[tuple[T, R]]:
+    """
+    Yields `(chunk, await compute(chunk))` in the order of `chunks`, with at
+    most `max_in_flight` computations running at once.
+    """
+    chunk_iter = iter(chunks)
+    pending: deque[tuple[T, asyncio.Future[R]]] = deque()
+
+    def schedule():
+        for chunk in chunk_iter:
+            pending.append((chunk, asyncio.ensure_future(compute(chunk))))
+            return
+
+    for _ in range(max_in_flight):
+        schedule()
+
+    try:
+        while pending:
+            chunk, future = pending.popleft()
+            result = await future
+            schedule()
+            yield chunk, result
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+
+def flatten(row: dict[str, Any]) -> dict[str, Any]:
+    flat: dict[str, Any] = {}
+    for key, value in row.items():
+        if isinstance(value, dict):
+            flat.update(value)
+        else:
+            flat[key] = value
+    return flat
+
+
+async def ndjson_lines(rows: AsyncIterator[dict[str, Any]]) -> AsyncIterator[bytes]:
+    async for row in rows:
+        yield dumps(row) + b"\n"
+
+
+async def csv_lines(rows: AsyncIterator[dict[str, Any]]) -> AsyncIterator[str]:
+    """
+    CSV lines of `rows`, with nested dicts flattened into columns.
+    """
+    buffer = io.StringIO()
+    writer: csv.DictWriter | None = None
+
+    async for row in rows:
+        row = flatten(row)
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(row), lineterminator="\n")
+            writer.writeheader()
+        writer.writerow(row)
+
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def stream_rows(
+    rows: AsyncIterator[dict[str, Any]], output: OutputFormat
+) -> StreamingResponse:
+    lines = csv_lines(rows) if output == OutputFormat.CSV else ndjson_lines(rows)
+    return StreamingResponse(lines, media_type=MEDIA_TYPES[output])
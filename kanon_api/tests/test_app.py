@@ -1,10 +1,21 @@
+import csv
+import io
+import json
+import time
+
+import numpy as np
 import pytest
 from fastapi.exceptions import HTTPException
 from fastapi.testclient import TestClient
 from kanon.models.models import equ_of_the_sun, planet_double_arg_mercury
 from kanon.units import Sexagesimal
 
+from kanon_api import settings
 from kanon_api.app import app
+from kanon_api.core.ephemerides.float_position import MAX_DEVIATION
+from kanon_api.result_cache import result_cache
+from kanon_api.routes.ephemerides import MAX_GRID_SIZE, MAX_SERIES_SIZE, GridRequest
+from kanon_api.streaming import degrees
 
 sdate = (1327, 7, 3)
 
@@ -424,3 +435,400 @@ def test_openapi():
     response = client.get("/openapi.json")
 
     assert response.status_code == 200
+
+
+def test_readiness_check():
+    with TestClient(app) as client:
+        response = client.get("ready")
+        while response.status_code == 503:
+            time.sleep(0.1)
+            response = client.get("ready")
+
+    assert response.status_code == 200
+    content = response.json()
+    assert content["ready"]
+    assert content["warm_workers"] == content["workers"]
+    assert len(content["table_load_times"]) == content["workers"]
+    assert content["cold_start"] > 0
+
+
+@pytest.mark.parametrize("engine", ["exact", "fast"])
+def test_table_store(engine, monkeypatch):
+    monkeypatch.setattr(settings, "TABLE_ENGINE", engine)
+
+    with TestClient(app):
+        store = app.state.executor.table_store
+        assert (store is not None) == (engine == "fast")
+
+
+def test_true_pos_result_cache():
+    params = {"year": 1400, "month": 2, "day": 1, "number_of_values": 10}
+    url = "ephemerides/parisian_alphonsine_tables/mars/true_pos"
+
+    with TestClient(app) as client:
+        result_cache.clear()
+
+        first = client.get(url, params=params).json()
+
+        misses = result_cache.stats["misses"]
+        hits = result_cache.stats["hits"]
+
+        second = client.get(url, params={**params, "number_of_values": 15}).json()
+
+        assert second[:10] == first
+        assert result_cache.stats["hits"] - hits == 10
+        assert result_cache.stats["misses"] - misses == 5
+
+        assert client.get("cache").json()["entries"] == 15
+
+
+def test_get_all_true_pos():
+    params = {"year": 1327, "month": 7, "day": 3, "number_of_values": 3, "step": 5}
+    url = "ephemerides/parisian_alphonsine_tables"
+
+    with TestClient(app) as client:
+        result_cache.clear()
+
+        response = client.get(f"{url}/true_pos", params=params)
+        assert response.status_code == 200, response.text
+        content = response.json()
+
+        assert len(content) == 3
+
+        for planet in ("sun", "moon", "mars", "venus", "jupiter", "mercury", "saturn"):
+            result_cache.clear()
+            single = client.get(f"{url}/{planet}/true_pos", params=params).json()
+            assert [v["jdn"] for v in single] == [v["jdn"] for v in content]
+            assert [v["position"] for v in single] == [
+                v["positions"][planet] for v in content
+            ]
+
+
+def test_true_pos_streaming():
+    params = {"year": 1327, "month": 7, "day": 3, "number_of_values": 40, "step": 3}
+    url = "ephemerides/parisian_alphonsine_tables"
+
+    with TestClient(app) as client:
+        expected = client.get(f"{url}/moon/true_pos", params=params).json()
+
+        response = client.get(
+            f"{url}/moon/true_pos", params={**params, "format": "ndjson"}
+        )
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert [json.loads(line) for line in response.text.splitlines()] == expected
+
+        response = client.get(
+            f"{url}/moon/true_pos", params={**params, "format": "csv"}
+        )
+        assert response.headers["content-type"].startswith("text/csv")
+        assert list(csv.DictReader(io.StringIO(response.text))) == [
+            {"jdn": str(v["jdn"]), "position": v["position"]} for v in expected
+        ]
+
+        expected_all = client.get(f"{url}/true_pos", params=params).json()
+        response = client.get(f"{url}/true_pos", params={**params, "format": "csv"})
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [row.pop("jdn") for row in rows] == [str(v["jdn"]) for v in expected_all]
+        assert rows == [v["positions"] for v in expected_all]
+
+        params["number_of_values"] = MAX_SERIES_SIZE + 1
+        response = client.get(f"{url}/moon/true_pos", params=params)
+        assert response.status_code == 400
+
+        # Streams are admitted with the estimated cost of all their values
+        params["number_of_values"] = 10**9
+        response = client.get(f"{url}/true_pos", params={**params, "format": "csv"})
+        assert response.status_code == 400
+
+
+def test_ascendant_and_houses_grid():
+    url = "ephemerides/parisian_alphonsine_tables"
+    grid = {
+        "instants": {
+            "start": {"year": 1327, "month": 7, "day": 3, "hours": 6},
+            "number_of_values": 5,
+            "step_minutes": 150,
+        },
+        "latitudes": {"start": 31, "stop": 35, "step": 1.9},
+    }
+
+    with TestClient(app) as client:
+        response = client.post(f"{url}/ascendant/grid/", json=grid)
+        assert response.status_code == 200, response.text
+        ascendants = response.json()
+
+        response = client.post(
+            f"{url}/houses/grid/", params={"method": "M1"}, json=grid
+        )
+        assert response.status_code == 200, response.text
+        houses = response.json()
+
+        assert ascendants["latitudes"] == houses["latitudes"] == [31, 32.9, 34.8]
+        assert len(ascendants["jdn"]) == len(ascendants["values"]) == 5
+
+        for row, minutes in enumerate(range(6 * 60, 6 * 60 + 5 * 150, 150)):
+            params = {
+                "year": 1327,
+                "month": 7,
+                "day": 3,
+                "hours": minutes // 60,
+                "minutes": minutes % 60,
+            }
+            for column, latitude in enumerate(ascendants["latitudes"]):
+                expected = client.get(
+                    f"{url}/ascendant", params={**params, "latitude": latitude}
+                ).json()
+                assert ascendants["values"][row][column] == expected["value"]
+
+                expected = client.get(
+                    f"{url}/houses",
+                    params={**params, "latitude": latitude, "method": "M1"},
+                ).json()
+                assert houses["values"][row][column] == expected
+
+        response = client.post(f"{url}/ascendant/grid/", json={**grid, "latitudes": []})
+        assert response.status_code == 400
+
+        response = client.post(
+            f"{url}/ascendant/grid/", json={**grid, "latitudes": [91]}
+        )
+        assert response.status_code == 422
+
+        latitudes = {"start": -90, "stop": 90, "step": 1e-5}
+        response = client.post(
+            f"{url}/ascendant/grid/", json={**grid, "latitudes": latitudes}
+        )
+        assert response.status_code == 422
+
+        latitudes = {"start": -90, "stop": 90, "step": 1e-3}
+        assert GridRequest(instants=grid["instants"], latitudes=latitudes).size > (
+            MAX_GRID_SIZE
+        )
+        response = client.post(
+            f"{url}/ascendant/grid/", json={**grid, "latitudes": latitudes}
+        )
+        assert response.status_code == 400
+
+
+def test_houses_compare():
+    params = {"year": 1327, "month": 7, "day": 3, "latitude": 31}
+    url = "ephemerides/parisian_alphonsine_tables/houses"
+
+    response = client.get(f"{url}/compare", params=params)
+    assert response.status_code == 200, response.text
+
+    for method, houses in response.json().items():
+        expected = client.get(url, params={**params, "method": method}).json()
+        assert houses == expected
+
+
+def test_events():
+    url = "ephemerides/parisian_alphonsine_tables"
+    params = {"year": 1327, "month": 7, "day": 3, "number_of_days": 40}
+
+    with TestClient(app) as client:
+        response = client.get(
+            f"{url}/events",
+            params={**params, "events": ["syzygy", "ingress"], "bodies": ["sun"]},
+        )
+        assert response.status_code == 200, response.text
+        events = response.json()
+
+        assert [e["jdn"] for e in events] == sorted(e["jdn"] for e in events)
+        assert [e["name"] for e in events if e["type"] == "syzygy"] == [
+            "full_moon",
+            "new_moon",
+            "full_moon",
+        ]
+
+        (ingress,) = (e for e in events if e["type"] == "ingress")
+        assert ingress["name"] == "leo"
+        assert ingress["bodies"] == ["sun"]
+        assert Sexagesimal(ingress["longitude"]) == Sexagesimal("2,0;0,0")
+
+        response = client.get(f"{url}/events", params={**params, "events": ["eclipse"]})
+        assert response.status_code == 422
+
+
+def test_table_sets_info():
+    with TestClient(app) as client:
+        info = client.get("table_sets").json()
+
+    assert info["parisian_alphonsine_tables"]["loaded"]
+    assert info["parisian_alphonsine_tables"]["bytes"] > 0
+
+
+def test_metrics():
+    with TestClient(app) as client:
+        client.get("ready")
+        client.get(
+            "ephemerides/parisian_alphonsine_tables/sun/true_pos",
+            params={"year": 1327, "month": 7, "day": 5, "number_of_values": 20},
+        )
+        response = client.get("metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+    lines = response.text.splitlines()
+
+    def samples(prefix: str) -> list[str]:
+        return [line for line in lines if line.startswith(prefix)]
+
+    assert samples('kanon_request_duration_seconds_count{route="/ready",method="GET"')
+    assert samples(
+        "kanon_request_duration_seconds_count"
+        '{route="/ephemerides/{table_set}/{planet}/true_pos/"'
+    )
+    assert samples('kanon_requests_in_flight{route="/metrics"} 1.0')
+    for stage in ("wait", "ipc", "compute"):
+        assert samples(
+            f'kanon_executor_{stage}_seconds_count{{task="compute_true_pos_batch"}}'
+        )
+    assert samples("kanon_pool_workers ")
+    assert samples('kanon_result_cache_events_total{event="hits"}')
+    assert samples(
+        'kanon_table_set_load_seconds{table_set="parisian_alphonsine_tables"}'
+    )
+
+
+def test_http_cache(monkeypatch):
+    url = "calendars/Julian A.D./from_jdn/"
+
+    response = client.get(url, params={"jdn": 2206525})
+    tag = response.headers["etag"]
+    assert response.status_code == 200
+    assert response.headers["cache-control"].startswith("public, max-age=")
+
+    assert client.get(url, params={"jdn": 2206525}).headers["etag"] == tag
+    assert client.get(url, params={"jdn": 2206526}).headers["etag"] != tag
+
+    def fail(*args, **kwargs):  # pragma: no cover
+        raise AssertionError("Computed a cached response")
+
+    monkeypatch.setattr("kanon_api.routes.calendars.hours_to_day", fail)
+
+    for if_none_match in (tag, f'"other", W/{tag}', "*"):
+        response = client.get(
+            url, params={"jdn": 2206525}, headers={"If-None-Match": if_none_match}
+        )
+        assert response.status_code == 304
+        assert response.headers["etag"] == tag
+        assert not response.content
+
+    monkeypatch.undo()
+
+    response = client.get(
+        url, params={"jdn": 2206525}, headers={"If-None-Match": '"other"'}
+    )
+    assert response.status_code == 200
+
+    assert "etag" not in client.get("health").headers
+    assert "etag" not in client.get(url, params={"jdn": "invalid"}).headers
+
+
+def test_npz_output():
+    params = {"year": 1327, "month": 7, "day": 3, "number_of_values": 20, "step": 3}
+    url = "ephemerides/parisian_alphonsine_tables"
+
+    def load(response) -> dict:
+        assert response.status_code == 200, response.text
+        assert response.headers["content-type"] == "application/x-npz"
+        with np.load(io.BytesIO(response.content)) as arrays:
+            return {name: arrays[name] for name in arrays.files}
+
+    with TestClient(app) as client:
+        expected = client.get(f"{url}/moon/true_pos", params=params).json()
+        arrays = load(
+            client.get(f"{url}/moon/true_pos", params={**params, "format": "npz"})
+        )
+        assert arrays["jdn"].dtype == arrays["position"].dtype == np.float64
+        assert list(arrays["jdn"]) == [v["jdn"] for v in expected]
+        assert np.allclose(
+            arrays["position"], [float(Sexagesimal(v["position"])) for v in expected]
+        )
+
+        expected_all = client.get(f"{url}/true_pos", params=params).json()
+        arrays = load(client.get(f"{url}/true_pos", params={**params, "format": "npz"}))
+        assert np.allclose(
+            arrays["mars"],
+            [float(Sexagesimal(v["positions"]["mars"])) for v in expected_all],
+        )
+
+        grid = {
+            "instants": [{"year": 1327, "month": 7, "day": d} for d in (3, 4)],
+            "latitudes": [31, 48],
+        }
+        expected = client.post(f"{url}/houses/grid/", json=grid).json()
+        arrays = load(
+            client.post(f"{url}/houses/grid/", params={"format": "npz"}, json=grid)
+        )
+        assert list(arrays["latitudes"]) == [31, 48]
+        assert arrays["values"].shape == (2, 2, 12)
+        assert np.allclose(
+            arrays["values"],
+            [
+                [[float(Sexagesimal(h)) for h in c] for c in r]
+                for r in expected["values"]
+            ],
+        )
+
+        response = client.post(
+            f"{url}/ascendant/grid/", params={"format": "csv"}, json=grid
+        )
+        assert response.status_code == 400
+
+    response = client.post(
+        f"models/{equ_of_the_sun.formula_id}/fill/",
+        params={"format": "npz"},
+        json={"arg1": list(range(10)), "params": {"50": 1}},
+    )
+    arrays = load(response)
+    assert list(arrays["values"]) == [equ_of_the_sun(x, 1) for x in range(10)]
+
+
+def test_float_precision():
+    params = {"year": 1327, "month": 7, "day": 3, "number_of_values": 20, "step": 3}
+    url = "ephemerides/parisian_alphonsine_tables"
+
+    with TestClient(app) as client:
+        exact = client.get(f"{url}/moon/true_pos", params=params).json()
+        response = client.get(
+            f"{url}/moon/true_pos", params={**params, "precision": "float"}
+        )
+        assert response.status_code == 200
+        values = response.json()
+        assert [v["jdn"] for v in values] == [v["jdn"] for v in exact]
+        assert all(isinstance(v["position"], float) for v in values)
+        assert np.allclose(
+            [v["position"] for v in values],
+            [float(Sexagesimal(v["position"])) for v in exact],
+            rtol=0,
+            atol=MAX_DEVIATION,
+        )
+
+        response = client.get(
+            f"{url}/true_pos", params={**params, "precision": "float", "format": "csv"}
+        )
+        assert response.status_code == 200
+        assert len(response.text.splitlines()) == 21
+
+        params = {"year": 1327, "month": 7, "day": 3, "latitude": 48}
+        exact = client.get(f"{url}/ascendant", params=params).json()
+        response = client.get(
+            f"{url}/ascendant", params={**params, "precision": "float"}
+        )
+        assert response.status_code == 200
+        assert response.json()["value"] == pytest.approx(
+            float(Sexagesimal(exact["value"])), abs=MAX_DEVIATION
+        )
+
+        response = client.get(f"{url}/ascendant", params={**params, "precision": "x"})
+        assert response.status_code == 422
+
+
+@pytest.mark.parametrize(
+    "value", ["01,47 ; 18,48", "-02 ; 50", "00 ; 10,05", "-00 ; 00,30", "12", "-1,0"]
+)
+def test_degrees(value):
+    assert degrees(value) == pytest.approx(float(Sexagesimal(value)), abs=1e-12)
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from kanon_api import benchmarks
+from kanon_api.core.ephemerides.dishas import dishas_cache
+
+
+def test_benchmarks_run():
+    offline = dishas_cache.offline
+    try:
+        results = benchmarks.run(["parse", "houses[M2]"], repeat=1)
+
+        with pytest.raises(ValueError):
+            benchmarks.run(["unknown"])
+    finally:
+        dishas_cache.offline = offline
+
+    assert list(results["results"]) == ["parse", "houses[M2]"]
+    for timing in results["results"].values():
+        assert 0 < timing["best"] <= timing["median"]
+        assert timing["number"] >= 1
+
+
+def test_benchmarks_compare(tmp_path, capsys):
+    def results(**best: float):
+        return {
+            "version": benchmarks.BENCHMARKS_VERSION,
+            "results": {
+                name: {"number": 1, "best": b, "median": b} for name, b in best.items()
+            },
+        }
+
+    baseline = results(parse=1.0, ascendant=2.0, sun_true_pos=1.0)
+    current = results(parse=1.05, ascendant=3.0, moon_true_pos=1.0)
+
+    comparisons = benchmarks.compare(baseline, current)
+    assert [c.name for c in comparisons] == ["parse", "ascendant"]
+    assert comparisons[1].ratio == 1.5
+
+    assert benchmarks.regressions(comparisons, 0.1) == [comparisons[1]]
+    assert benchmarks.regressions(comparisons, 0.01) == comparisons
+    assert benchmarks.regressions(comparisons, 0.6) == []
+
+    for name, content in (("baseline", baseline), ("current", current)):
+        (tmp_path / f"{name}.json").write_text(json.dumps(content))
+
+    paths = [str(tmp_path / "baseline.json"), str(tmp_path / "current.json")]
+
+    assert benchmarks.main(["compare", *paths]) == 1
+    assert "REGRESSION" in capsys.readouterr().out
+    assert benchmarks.main(["compare", *paths, "--threshold", "0.6"]) == 0
+
+    with pytest.raises(ValueError):
+        benchmarks.compare({**baseline, "version": 0}, current)
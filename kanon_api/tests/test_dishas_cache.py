@@ -1,27 +1,24 @@
-import importlib
-import pathlib
-import shutil
-import sys
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
-from kanon_api import settings
-
-cache_dir = pathlib.Path("dishas_cache")
-
+import pytest
 
-def test_dishas_cache():
-
-    settings.PRODUCTION = True
+from kanon_api import settings
+from kanon_api.core.ephemerides.dishas import DishasCache, dishas_cache
+from kanon_api.core.ephemerides.table_pack import TABLE_SETS_DIR
+from kanon_api.core.ephemerides.tables import TableSetRegistry
 
-    if cache_dir.exists():
-        shutil.rmtree(cache_dir)
 
-    if "kanon_api.core.ephemerides.tables" in sys.modules:
-        import kanon_api.core.ephemerides.tables
+def test_dishas_cache(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "dishas_cache"
 
-        importlib.reload(kanon_api.core.ephemerides.tables)
+    monkeypatch.setattr(settings, "PRODUCTION", True)
+    monkeypatch.setattr(dishas_cache, "directory", cache_dir)
 
-    import kanon_api.core.ephemerides.tables
+    TableSetRegistry(TABLE_SETS_DIR, max_bytes=2**40)["parisian_alphonsine_tables"]
 
     assert cache_dir.exists()
 
@@ -32,8 +29,94 @@ def test_dishas_cache():
     mock_open: mock.MagicMock = mock.MagicMock(wraps=open)
 
     with mock.patch("builtins.open", mock_open):
-        importlib.reload(kanon_api.core.ephemerides.tables)
+        registry = TableSetRegistry(TABLE_SETS_DIR, max_bytes=2**40)
+        registry["parisian_alphonsine_tables"].load()
 
     assert mock_open.call_count == len(files)
 
-    settings.PRODUCTION = False
+
+def table_content(size: int) -> dict:
+    return {
+        "source_value_original": {
+            "args": {"argument1": [{"value": [str(i)]} for i in range(size)]},
+            "entry": [{"value": ["0", str(i), "30"]} for i in range(size)],
+        },
+        "argument1_name": "Arg",
+        "argument1_number_unit": "degree",
+        "argument1_significant_fractional_place": "0",
+        "argument1_type_of_number": "integer and sexagesimal",
+        "entry_significant_fractional_place": "2",
+        "entry_number_unit": "degree",
+        "entry_type_of_number": "sexagesimal",
+        "symmetries": [],
+        "edited_text": {},
+        "table_type": {"id": 0},
+    }
+
+
+@pytest.fixture
+def dishas_server():
+    requested: list[int] = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            tab_id = int(parse_qs(urlparse(self.path).query)["id"][0])
+            requested.append(tab_id)
+            body = json.dumps(table_content(tab_id) if tab_id < 100 else {})
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(body.encode())
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield f"http://127.0.0.1:{server.server_port}/?id={{}}", requested
+
+    server.shutdown()
+    server.server_close()
+
+
+def test_dishas_cache_layer(tmp_path, dishas_server):
+    url, requested = dishas_server
+    cache = DishasCache(tmp_path / "cache", url=url, max_workers=4)
+
+    cache.prefetch([5, 6, 7, 8, 5])
+
+    assert sorted(requested) == [5, 6, 7, 8]
+    assert cache.stats["misses"] == 4
+    assert sorted(p.name for p in cache.directory.iterdir()) == [
+        "5.json",
+        "6.json",
+        "7.json",
+        "8.json",
+    ]
+
+    table = cache.read(6)
+    assert len(table) == 6
+    assert cache.stats["hits"] == 1
+
+    cache.prefetch([5, 6])
+    assert len(requested) == 4
+
+    cache.path(7).write_text(cache.path(7).read_text()[:-10])
+    assert cache.get(7) == table_content(7)
+    assert cache.stats["invalid"] == 1
+    assert requested[-1] == 7
+    assert cache.get(7) == table_content(7)
+    assert len(requested) == 5
+
+    with pytest.raises(FileNotFoundError):
+        cache.get(101)
+    assert not cache.path(101).exists()
+
+    offline = DishasCache(tmp_path / "cache", url=url, offline=True)
+    assert offline.get(5) == table_content(5)
+    with pytest.raises(FileNotFoundError):
+        offline.get(9)
+    assert len(requested) == 6
@@ -0,0 +1,58 @@
+import asyncio
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+from kanon_api.metrics import Collector, Counter, Gauge, Histogram, Registry, run_timed
+
+
+def test_metrics_render():
+    registry = Registry()
+
+    counter: Counter = registry.register(Counter("c_total", "A counter."))
+    gauge: Gauge = registry.register(Gauge("g", "A gauge."))
+    histogram: Histogram = registry.register(
+        Histogram("h_seconds", "A histogram.", (0.1, 1, math.inf))
+    )
+    registry.register(
+        Collector(
+            "col", "A collector.", "gauge", lambda: [({"a": 'b"'}, 2), ({}, None)]
+        )
+    )
+
+    counter.inc()
+    counter.inc(2, route="/x")
+    gauge.inc(route="/x")
+    gauge.inc(route="/x")
+    gauge.dec(route="/x")
+    for value in (0.05, 0.5, 5):
+        histogram.observe(value, route="/x")
+
+    assert registry.render().splitlines() == [
+        "# HELP c_total A counter.",
+        "# TYPE c_total counter",
+        "c_total 1.0",
+        'c_total{route="/x"} 2.0',
+        "# HELP g A gauge.",
+        "# TYPE g gauge",
+        'g{route="/x"} 1.0',
+        "# HELP h_seconds A histogram.",
+        "# TYPE h_seconds histogram",
+        'h_seconds_bucket{route="/x",le="0.1"} 1.0',
+        'h_seconds_bucket{route="/x",le="1.0"} 2.0',
+        'h_seconds_bucket{route="/x",le="+Inf"} 3.0',
+        'h_seconds_sum{route="/x"} 5.55',
+        'h_seconds_count{route="/x"} 3.0',
+        "# HELP col A collector.",
+        "# TYPE col gauge",
+        'col{a="b\\""} 2.0',
+    ]
+
+
+def test_run_timed():
+    async def run():
+        with ThreadPoolExecutor(1) as executor:
+            return await run_timed(asyncio.get_running_loop(), executor, sum, [1, 2])
+
+    result, compute = asyncio.run(run())
+    assert result == 3
+    assert compute >= 0
@@ -0,0 +1,76 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from kanon.units import Sexagesimal
+
+from kanon_api import settings
+from kanon_api.result_cache import ResultCache
+from kanon_api.units import degree
+
+
+def test_result_cache_limits():
+    cache = ResultCache(max_entries=3, max_bytes=10_000)
+
+    cache.set_many({i: str(i) for i in range(4)})
+
+    assert cache.get_many(range(4)) == {1: "1", 2: "2", 3: "3"}
+    assert cache.stats["evictions"] == 1
+
+    cache.get(1)
+    cache.set(4, "4")
+    assert cache.get_many([1, 2]) == {1: "1"}
+
+    small = ResultCache(max_entries=100, max_bytes=200)
+    small.set_many({i: "x" * 50 for i in range(5)})
+    assert small.size <= 200
+    assert 0 < len(small.entries) < 5
+
+    assert small.info()["entries"] == len(small.entries)
+
+
+def test_result_cache_disk_tier(tmp_path):
+    value = Sexagesimal("1,2;3,4") / 7 * degree
+
+    first = ResultCache(max_entries=10, max_bytes=10_000, directory=tmp_path)
+    first.set(("ascendant", "tables", 1.5, 40.0), value)
+
+    second = ResultCache(max_entries=10, max_bytes=10_000, directory=tmp_path)
+    found = second.get(("ascendant", "tables", 1.5, 40.0))
+
+    assert found.value == value.value
+    assert found.unit == value.unit
+    assert second.stats["disk_hits"] == 1
+
+    assert second.get(("ascendant", "tables", 2.5, 40.0)) is None
+    assert second.info()["hits"] == 1
+    assert second.info()["misses"] == 1
+
+
+def test_result_cache_disk_versions(tmp_path, monkeypatch):
+    key = ("true_pos", "parisian_alphonsine_tables", "Sun", 1.5)
+
+    first = ResultCache(max_entries=10, max_bytes=10_000, directory=tmp_path)
+    first.set(key, "1,2;3")
+
+    monkeypatch.setattr(settings, "TABLE_ENGINE", "fast")
+    second = ResultCache(max_entries=10, max_bytes=10_000, directory=tmp_path)
+    assert second.get(key) is None
+
+    monkeypatch.setattr(settings, "TABLE_ENGINE", "exact")
+    assert second.get(key) == "1,2;3"
+
+
+def test_result_cache_disk_threads(tmp_path):
+    cache = ResultCache(max_entries=10, max_bytes=100_000, directory=tmp_path)
+
+    def work(thread: int):
+        for i in range(50):
+            cache.set_many({(thread, i, j): j for j in range(10)})
+            cache.get_many([(thread, i, j) for j in range(10)])
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(work, range(8)))
+
+    fresh = ResultCache(max_entries=10, max_bytes=100_000, directory=tmp_path)
+    assert fresh.get_many([(7, 49, j) for j in range(10)]) == {
+        (7, 49, j): j for j in range(10)
+    }
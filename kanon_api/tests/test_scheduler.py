@@ -0,0 +1,102 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+
+from kanon_api.scheduler import MIN_CHUNK_SIZE, Scheduler
+
+
+def double(delay: float, chunk) -> list:
+    time.sleep(delay * len(chunk))
+    return [2 * x for x in chunk]
+
+
+def test_scheduler_run():
+    async def run():
+        with ThreadPoolExecutor(2) as executor:
+            scheduler = Scheduler(executor, 2, chunk_seconds=0.01)
+
+            assert await scheduler.run(double, [], 0) == []
+            assert await scheduler.run(double, list(range(100)), 0) == [
+                2 * x for x in range(100)
+            ]
+            assert scheduler.chunk_size("double", 100) == 50
+
+            scheduler.costs["double"] = 0.001
+            assert scheduler.chunk_size("double", 1000) == MIN_CHUNK_SIZE
+            scheduler.costs["double"] = 0.0001
+            assert scheduler.chunk_size("double", 1000) == 100
+
+            assert scheduler.queued == 0
+            assert scheduler.running == 0
+
+    asyncio.run(run())
+
+
+def test_scheduler_fairness():
+    async def run():
+        with ThreadPoolExecutor(1) as executor:
+            scheduler = Scheduler(executor, 1)
+            scheduler.costs["double"] = 0.001
+
+            finished: list[str] = []
+
+            async def job(name: str, size: int):
+                await scheduler.run(double, list(range(size)), 0.001)
+                finished.append(name)
+
+            large = asyncio.ensure_future(job("large", 50 * MIN_CHUNK_SIZE))
+            await asyncio.sleep(0.01)
+            await job("small", 1)
+            await large
+
+            return finished
+
+    assert asyncio.run(run()) == ["small", "large"]
+
+
+def test_scheduler_admission():
+    async def run():
+        with ThreadPoolExecutor(1) as executor:
+            scheduler = Scheduler(executor, 1, max_queue_seconds=0.1, max_job_seconds=1)
+            scheduler.costs["double"] = 0.001
+
+            size = 20 * MIN_CHUNK_SIZE
+
+            large = asyncio.ensure_future(
+                scheduler.run(double, list(range(size)), 0.001)
+            )
+            await asyncio.sleep(0.01)
+
+            # Small jobs only wait for a chunk of each queued job
+            assert scheduler.ahead(1) < scheduler.queued
+            assert await scheduler.run(double, list(range(10)), 0) == [
+                2 * x for x in range(10)
+            ]
+            assert not large.done()
+
+            with pytest.raises(HTTPException) as err:
+                await scheduler.run(double, list(range(size)), 0)
+
+            assert err.value.status_code == 429
+            assert int(err.value.headers["Retry-After"]) >= 1
+
+            # Following jobs of admitted requests are always queued
+            assert await scheduler.run(double, [1], 0, admit=False) == [2]
+
+            scheduler.costs["double"] = 0.001
+            with pytest.raises(HTTPException) as err:
+                scheduler.admit(double, 2000)
+
+            assert err.value.status_code == 400
+
+            large.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await large
+
+            assert scheduler.queued == 0
+            assert not scheduler.jobs
+
+    asyncio.run(run())
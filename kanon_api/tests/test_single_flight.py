@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from kanon_api.metrics import single_flight_deduplicated
+from kanon_api.single_flight import SingleFlight
+
+
+def deduplicated(kind: str) -> float:
+    return single_flight_deduplicated.values.get((("kind", kind),), 0)
+
+
+def test_single_flight_call():
+    flight = SingleFlight()
+    calls: list[int] = []
+    started = threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return [1, 2]
+
+    before = deduplicated("sync")
+
+    with ThreadPoolExecutor(4) as executor:
+        first = executor.submit(flight.call, ("sync", 1), compute)
+        started.wait()
+        others = [executor.submit(flight.call, ("sync", 1), compute) for _ in range(3)]
+        results = [f.result() for f in [first, *others]]
+
+    assert results == [[1, 2]] * 4
+    assert len(calls) == 1
+    assert deduplicated("sync") == before + 3
+    assert not flight.calls
+
+    def fail():
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        flight.call(("sync", 2), fail)
+    assert not flight.calls
+
+
+def test_single_flight_run():
+    flight = SingleFlight()
+    calls: list[int] = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "value"
+
+    async def fail():
+        await asyncio.sleep(0.1)
+        raise ValueError
+
+    async def run():
+        before = deduplicated("async")
+
+        leader = asyncio.ensure_future(flight.run(("async", 1), compute))
+        await asyncio.sleep(0)
+        followers = [flight.run(("async", 1), compute) for _ in range(3)]
+
+        # Cancelling the request which started the computation doesn't cancel it
+        leader.cancel()
+        assert await asyncio.gather(*followers) == ["value"] * 3
+        assert len(calls) == 1
+        assert deduplicated("async") == before + 3
+
+        results = await asyncio.gather(
+            flight.run(("async", 2), fail),
+            flight.run(("async", 2), fail),
+            return_exceptions=True,
+        )
+        assert all(isinstance(r, ValueError) for r in results)
+
+        await asyncio.sleep(0)
+        assert not flight.calls
+
+    asyncio.run(run())
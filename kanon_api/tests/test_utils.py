@@ -1,6 +1,8 @@
+import threading
+
 import pytest
 
-from kanon_api.utils import StaticMeta
+from kanon_api.utils import DeferedMeta, StaticMeta, initialize
 
 
 def test_staticmeta():
@@ -9,3 +11,41 @@ def test_staticmeta():
 
     with pytest.raises(TypeError):
         A()
+
+
+def test_deferedmeta():
+    calls = []
+
+    class A(metaclass=DeferedMeta):
+        def __init__(self, value: int):
+            calls.append(value)
+            self.value = value
+            assert not hasattr(self, "missing")
+
+        def double(self) -> int:
+            return 2 * self.value
+
+    class B(A):
+        pass
+
+    a, b = A(1), B(2)
+    assert not calls
+    assert isinstance(b, A) and type(b) is not B
+
+    threads = [threading.Thread(target=b.double) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [2]
+    assert type(b) is B
+    assert b.load_time >= 0
+    assert vars(b) == {"value": 2, "load_time": b.load_time}
+
+    assert initialize(a)
+    assert type(a) is A and a.double() == 2
+    assert calls == [2, 1]
+
+    with pytest.raises(AttributeError):
+        a.missing
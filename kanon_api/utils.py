@@ -1,17 +1,16 @@
 import inspect
-from concurrent.futures.process import ProcessPoolExecutor
+import threading
+import time
 from enum import Enum
-from typing import Type, TypeVar, no_type_check
+from functools import lru_cache
+from typing import Any, Iterator, Sequence, Type, TypeVar, no_type_check
 
 import kanon.units.definitions as definitions
-from fastapi import Request
 from fastapi.exceptions import HTTPException
 from fastapi.param_functions import Query
 from kanon.calendars import Calendar, Date
 from kanon.units import BasedReal
 
-from . import settings
-
 JULIAN_CALENDAR = Calendar.registry["Julian A.D."]
 
 
@@ -105,8 +104,19 @@ class Planet(StrEnum):
     SATURN = "saturn"
 
 
-def get_executor(request: Request) -> ProcessPoolExecutor:
-    return request.app.state.executor
+class Precision(StrEnum):
+    """
+    Exact sexagesimal results, rounded to the second of arc, or float64
+    degrees computed with the compiled tables, much faster.
+    """
+
+    EXACT = "exact"
+    FLOAT = "float"
+
+
+def split_in_chunks(values: Sequence[T], size: int) -> Iterator[Sequence[T]]:
+    for idx in range(0, len(values), size):
+        yield values[idx : idx + size]  # noqa: E203
 
 
 class StaticMeta(type):
@@ -115,21 +125,75 @@ class StaticMeta(type):
 
 
 class DeferedMeta(type):
+    """
+    Metaclass deferring the initialization of its instances to the first
+    access of one of their missing attributes, or to `initialize`.
+
+    Pending instances belong to a subclass whose `__getattr__` runs the
+    initialization, then get back their own class, so that initialized
+    instances have no attribute access overhead.
+    """
+
     def __call__(cls, *args, **kwargs):
-        if settings.PRODUCTION:
-            return super().__call__(*args, **kwargs)
-
-        def init_before_get(obj, attr):
-            try:
-                if not object.__getattribute__(obj, "_initialized"):
-                    obj._initialized = True
-                    object.__getattribute__(obj, "__init__")(*args, **kwargs)
-            except AttributeError:
-                pass
-            return object.__getattribute__(obj, attr)
-
-        cls.__getattribute__ = init_before_get
-
-        new_obj = cls.__new__(cls, *args, **kwargs)
-        new_obj._initialized = False
-        return new_obj
+        obj = cls.__new__(deferred_class(cls))
+        obj.__dict__["_deferred"] = (args, kwargs)
+        obj.__dict__["_deferred_lock"] = threading.RLock()
+        return obj
+
+
+def _initialize_on_access(obj, attr: str):
+    if not initialize(obj):
+        # Attributes missing while the instance is being initialized
+        raise AttributeError(attr)
+    return getattr(obj, attr)
+
+
+@lru_cache(maxsize=None)
+def deferred_class(cls: DeferedMeta) -> type:
+    return type(cls)(
+        f"Deferred{cls.__name__}",
+        (cls,),
+        {
+            "__getattr__": _initialize_on_access,
+            "__module__": cls.__module__,
+            "_deferred_base": cls,
+        },
+    )
+
+
+def initialize(obj: Any) -> bool:
+    """
+    Runs the deferred initialization of a `DeferedMeta` instance, if pending,
+    recording its duration in `load_time`.
+
+    Returns `False` if called while the instance is being initialized.
+    """
+    base = type(obj).__dict__.get("_deferred_base")
+    lock = obj.__dict__.get("_deferred_lock")
+
+    if base is None or lock is None:
+        return True
+
+    with lock:
+        # Initialized by another thread in the meantime
+        if type(obj) is base:
+            return True
+
+        pending = obj.__dict__.pop("_deferred", None)
+        if pending is None:
+            return False
+
+        args, kwargs = pending
+
+        start = time.perf_counter()
+        try:
+            base.__init__(obj, *args, **kwargs)
+        except BaseException:
+            obj.__dict__["_deferred"] = pending
+            raise
+
+        obj.load_time = time.perf_counter() - start
+        obj.__class__ = base
+        del obj.__dict__["_deferred_lock"]
+
+    return True
@@ -0,0 +1,65 @@
+"""
+Versions of the code and of the table sets, identifying the results computed
+with them.
+"""
+
+import hashlib
+import importlib.metadata
+from functools import lru_cache
+from pathlib import Path
+
+from kanon_api import settings
+
+from .core.ephemerides.tables import table_sets
+
+
+def digest(*parts: bytes) -> str:
+    hasher = hashlib.sha256()
+    for part in parts:
+        hasher.update(hashlib.sha256(part).digest())
+    return hasher.hexdigest()
+
+
+@lru_cache
+def code_version() -> str:
+    """
+    `settings.CODE_VERSION`, or else a hash of the sources of the package,
+    with the version of kanon.
+    """
+    if settings.CODE_VERSION:
+        code = settings.CODE_VERSION.encode()
+    else:
+        sources = sorted(Path(__file__).parent.rglob("*.py"))
+        code = digest(*(path.read_bytes() for path in sources)).encode()
+
+    return digest(code, importlib.metadata.version("kanon").encode())
+
+
+@lru_cache
+def table_set_version(name: str) -> str:
+    if (path := table_sets.paths.get(name)) is None:
+        return ""
+    return digest(path.read_bytes())
+
+
+def tables_version(table_set: str) -> str:
+    """
+    Hash of the versions of the code and of the table set, for results always
+    computed with exact lookups.
+    """
+    return digest(code_version().encode(), table_set_version(table_set).encode())
+
+
+@lru_cache
+def _results_version(engine: str, table_set: str) -> str:
+    return digest(
+        code_version().encode(), engine.encode(), table_set_version(table_set).encode()
+    )
+
+
+def results_version(table_set: str) -> str:
+    """
+    Hash of the versions of the code, of the table engine and of the table set
+    that results depend on.
+    """
+    return _results_version(settings.TABLE_ENGINE, table_set)
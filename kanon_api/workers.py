@@ -0,0 +1,119 @@
+import multiprocessing
+import os
+import queue
+import time
+from concurrent.futures.process import ProcessPoolExecutor
+
+from kanon_api import settings
+from kanon_api.core.ephemerides.shared import (
+    SharedTableStore,
+    StoreHandle,
+    attach_store,
+)
+
+
+def load_table_sets():
+    """
+    Loads the table sets of `settings.PRELOADED_TABLE_SETS`, others being
+    loaded by each worker when first used.
+    """
+    from kanon_api.core.ephemerides.tables import table_sets
+
+    for name in settings.PRELOADED_TABLE_SETS:
+        table_sets[name]
+
+
+def create_table_store() -> SharedTableStore:
+    """
+    Loads the preloaded table sets and puts their compiled tables in shared
+    memory.
+    """
+    from kanon_api.core.ephemerides.tables import table_sets
+
+    load_table_sets()
+
+    return SharedTableStore.create(
+        {
+            function.key: function.shared_table
+            for name in settings.PRELOADED_TABLE_SETS
+            for function in table_sets[name].table_functions
+        }
+    )
+
+
+def init_worker(warm_queue: multiprocessing.Queue, store_handle: StoreHandle | None):
+    start = time.perf_counter()
+
+    if store_handle is not None:
+        attach_store(store_handle)
+    load_table_sets()
+
+    warm_queue.put((os.getpid(), time.perf_counter() - start))
+
+
+class WorkerPool(ProcessPoolExecutor):
+    """
+    `ProcessPoolExecutor` whose workers load the preloaded table sets when they
+    start.
+
+    With the fast table engine, they share the compiled tables loaded once by
+    the parent process. Exact lookups read the `HTable` of each worker, so the
+    parent loads nothing for them.
+    """
+
+    def __init__(self, max_workers: int | None = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+        # Forked workers would get private copies of the parent tables
+        context = multiprocessing.get_context("forkserver")
+
+        self.warm_queue: multiprocessing.Queue = context.Queue()
+        self.table_store = (
+            create_table_store() if settings.TABLE_ENGINE == "fast" else None
+        )
+
+        super().__init__(
+            self.max_workers,
+            mp_context=context,
+            initializer=init_worker,
+            initargs=(
+                self.warm_queue,
+                self.table_store.handle if self.table_store else None,
+            ),
+        )
+
+        self.created = time.perf_counter()
+        self.load_times: dict[int, float] = {}
+        self.cold_start: float | None = None
+        self.closed = False
+
+    def shutdown(self, *args, **kwargs):
+        self.closed = True
+        super().shutdown(*args, **kwargs)
+        if self.table_store is not None:
+            self.table_store.unlink()
+
+    @property
+    def ready(self) -> bool:
+        return self.cold_start is not None
+
+    def warm_up(self):
+        """
+        Starts every worker and blocks until all of them have loaded the tables.
+        """
+
+        for _ in range(self.max_workers):
+            self.submit(os.getpid)
+
+        while len(self.load_times) < self.max_workers:
+            try:
+                pid, duration = self.warm_queue.get(timeout=1)
+            except queue.Empty:
+                if self.closed:
+                    return
+                # Raises BrokenProcessPool if a worker failed to initialize
+                self.submit(os.getpid)
+                continue
+            self.load_times[pid] = duration
+
+        self.cold_start = time.perf_counter() - self.created